@@ -0,0 +1,144 @@
+from __future__ import annotations
+from typing import *
+
+import os
+import sys
+
+import src.settings as settings
+from src.palette import ansi_sgr
+from src.virtualscreen import VirtualScreen
+
+try:
+    import termios
+except ImportError:  # not a unix terminal, keys will be echoed
+    termios = None
+
+# unchanged cells worth rewriting to save a cursor movement, which takes about as many bytes
+_MAX_GAP = 6
+
+
+class AnsiScreen(VirtualScreen):
+    """
+    Rendering backend writing ANSI escape sequences straight to the terminal. Frames are
+    built on a virtual screen, and doupdate() writes only the spans that differ from the
+    previous frame, in a single write.
+    """
+
+    def __init__(self, out: TextIO = None, size: Optional[Tuple[int, int]] = None):
+        """
+        Inits class AnsiScreen
+        :param out: stream the frames are written to, stdout if None
+        :param size: (lines, columns), the terminal's size if None
+        """
+        self._out = out or sys.stdout
+        self._fixed_size = size is not None
+        super(AnsiScreen, self).__init__(size or self._terminal_size())
+        self._saved_tty = None
+        self.bytes_written = 0
+
+    def _allocate(self, lines: int, cols: int):
+        super(AnsiScreen, self)._allocate(lines, cols)
+        self._front_chars = None  # what the terminal shows, None forces a full repaint
+        self._front_attrs = None
+        self._pen = None  # attribute the terminal currently writes with
+
+    @staticmethod
+    def _terminal_size() -> Tuple[int, int]:
+        try:
+            size = os.get_terminal_size()
+            return size.lines, size.columns
+        except OSError:
+            return settings.WINDOW_SIZE[1], settings.WINDOW_SIZE[0]
+
+    def check_resize(self) -> bool:
+        """
+        Follows the terminal's size; on a change the buffer is cleared and fully repainted
+        """
+        if self._fixed_size:
+            return False
+        size = self._terminal_size()
+        if size == (self._lines, self._cols):
+            return False
+        self._allocate(*size)
+        return True
+
+    def doupdate(self) -> None:
+        super(AnsiScreen, self).doupdate()
+        out = []
+        chars, attrs = self.chars, self.attrs
+        front_chars, front_attrs = self._front_chars, self._front_attrs
+        full = front_chars is None
+        if full:
+            out.append('\x1b[0m\x1b[2J')
+            self._pen = None
+        cols = self._cols
+        for row_start in range(0, len(chars), cols):
+            row_end = row_start + cols
+            if not full and chars[row_start:row_end] == front_chars[row_start:row_end] \
+                    and attrs[row_start:row_end] == front_attrs[row_start:row_end]:
+                continue
+            idx = row_start
+            while idx < row_end:
+                if not full and chars[idx] == front_chars[idx] and attrs[idx] == front_attrs[idx]:
+                    idx += 1
+                    continue
+                # a span of changed cells, bridging short runs of unchanged ones
+                last = end = idx
+                while end < row_end and end - last <= _MAX_GAP:
+                    if full or chars[end] != front_chars[end] or attrs[end] != front_attrs[end]:
+                        last = end
+                    end += 1
+                out.append(f'\x1b[{row_start // cols + 1};{idx - row_start + 1}H')
+                self._write_cells(out, idx, last + 1)
+                idx = last + 1
+
+        self._front_chars = chars[:]
+        self._front_attrs = attrs[:]
+        if out:
+            frame = ''.join(out)
+            self._out.write(frame)
+            self._out.flush()
+            self.bytes_written += len(frame.encode())
+
+    def _write_cells(self, out: List[str], start: int, end: int):
+        chars, attrs = self.chars, self.attrs
+        pen = self._pen
+        run_start = start
+        for idx in range(start, end):
+            if attrs[idx] != pen:
+                if idx > run_start:
+                    out.append(''.join(chars[run_start:idx]))
+                pen = attrs[idx]
+                out.append(ansi_sgr(pen))
+                run_start = idx
+        out.append(''.join(chars[run_start:end]))
+        self._pen = pen
+
+    def open(self) -> AnsiScreen:
+        """
+        Switches to the alternate screen, hides the cursor and stops the terminal from echoing keys
+        """
+        if termios is not None and sys.stdin.isatty():
+            fd = sys.stdin.fileno()
+            self._saved_tty = termios.tcgetattr(fd)
+            mode = termios.tcgetattr(fd)
+            mode[3] &= ~(termios.ECHO | termios.ICANON)
+            termios.tcsetattr(fd, termios.TCSANOW, mode)
+        self._out.write('\x1b[?1049h\x1b[?25l')
+        self._front_chars = None
+        return self
+
+    def close(self) -> None:
+        self._out.write('\x1b[0m\x1b[?25h\x1b[?1049l')
+        self._out.flush()
+        if self._saved_tty is not None:
+            fd = sys.stdin.fileno()
+            termios.tcflush(fd, termios.TCIFLUSH)  # drop the keys typed while playing
+            termios.tcsetattr(fd, termios.TCSANOW, self._saved_tty)
+            self._saved_tty = None
+
+    def __enter__(self) -> AnsiScreen:
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+from typing import *
+
+import numpy as np
+
+from src.board import Board
+from src.pieces import SHAPES, KICKS, SPAWN_Y
+
+_SHAPES = np.array(SHAPES, dtype=np.int64)  # kind, rotation, tile, (x, y)
+# kind, rotation, direction, candidate, (x, y); shorter kick lists are padded by repeating their last candidate
+_KICKS = np.array([[[candidates + candidates[-1:] * (5 - len(candidates)) for candidates in directions]
+                    for directions in rotations] for rotations in KICKS], dtype=np.int64)
+_COLORS = np.array(Board.COLORS, dtype=np.uint8)
+_SPAWN_Y = np.array(SPAWN_Y, dtype=np.int64)
+
+
+class BatchBoard:
+    """
+    N independent playfields stepped together with vectorized NumPy calls.
+    contents has shape (N, size_y, size_x) and holds color indices, 0 meaning an empty tile.
+    Every operation takes an optional boolean mask selecting the boards it applies to.
+    """
+
+    def __init__(self, count: int, size_x: int, size_y: int, seed: Optional[int] = None):
+        self.size_x = size_x
+        self.size_y = size_y
+        self._rng = np.random.default_rng(seed)
+        self.contents = np.zeros((count, size_y, size_x), dtype=np.uint8)
+        self.kind = np.zeros(count, dtype=np.int64)
+        self.rotation = np.zeros(count, dtype=np.int64)
+        self.x = np.zeros(count, dtype=np.int64)
+        self.y = np.zeros(count, dtype=np.int64)
+        self.next_kind = np.zeros(count, dtype=np.int64)
+        self.next_x = np.zeros(count, dtype=np.int64)
+        self.topped_out = np.zeros(count, dtype=bool)
+        self.reset()
+
+    @property
+    def count(self) -> int:
+        return len(self.contents)
+
+    def reset(self, mask: Optional[np.ndarray] = None):
+        idx = self._indices(mask)
+        self.contents[idx] = 0
+        self.next_kind[idx], self.next_x[idx] = self._random_blocks(len(idx))
+        self._spawn(idx)
+        self.next_kind[idx], self.next_x[idx] = self._random_blocks(len(idx))
+        self.topped_out[idx] = False
+
+    def move_block(self, dir: str, mask: Optional[np.ndarray] = None) -> np.ndarray:  # n, s, w, e
+        idx = self._indices(mask)
+        x = self.x[idx] + (-1 if dir == 'w' else 1 if dir == 'e' else 0)
+        y = self.y[idx] + (-1 if dir == 'n' else 1 if dir == 's' else 0)
+        moved = self._fits(idx, self.kind[idx], self.rotation[idx], x, y)
+        self.x[idx[moved]] = x[moved]
+        self.y[idx[moved]] = y[moved]
+        return self._scatter(idx, moved)
+
+    def rotate_block(self, dir: str, mask: Optional[np.ndarray] = None) -> np.ndarray:  # l, r
+        idx = self._indices(mask)
+        kind = self.kind[idx]
+        rotation = (self.rotation[idx] + (1 if dir == 'r' else -1)) % 4
+        kicks = _KICKS[kind, self.rotation[idx], 0 if dir == 'r' else 1]
+        rotated = np.zeros(len(idx), dtype=bool)
+        for candidate in range(kicks.shape[1]):
+            x = self.x[idx] + kicks[:, candidate, 0]
+            y = self.y[idx] + kicks[:, candidate, 1]
+            fits = ~rotated & self._fits(idx, kind, rotation, x, y)
+            self.x[idx[fits]] = x[fits]
+            self.y[idx[fits]] = y[fits]
+            self.rotation[idx[fits]] = rotation[fits]
+            rotated |= fits
+        return self._scatter(idx, rotated)
+
+    def hard_drop(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Moves the falling pieces down as far as they go in a single step
+        :return: distance travelled by each board's piece (0 for boards outside the mask)
+        """
+        idx = self._indices(mask)
+        xs, ys = self._tiles(self.kind[idx], self.rotation[idx], self.x[idx], self.y[idx])
+        columns = self.contents[idx[:, None], :, xs] != 0  # board, tile, row
+        rows = np.arange(self.size_y)
+        blocked = columns & (rows > ys[:, :, None])
+        first = np.where(blocked.any(axis=2), blocked.argmax(axis=2), self.size_y)
+        distance = (first - ys - 1).min(axis=1)
+        self.y[idx] += distance
+        result = np.zeros(self.count, dtype=np.int64)
+        result[idx] = distance
+        return result
+
+    def place_block(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Locks the falling pieces, clears full lines and spawns the next pieces
+        :return: number of lines cleared on each board (0 for boards outside the mask)
+        """
+        idx = self._indices(mask)
+        xs, ys = self._tiles(self.kind[idx], self.rotation[idx], self.x[idx], self.y[idx])
+        self.contents[idx[:, None], ys, xs] = _COLORS[self.kind[idx]][:, None]
+
+        fields = self.contents[idx]
+        full = (fields != 0).all(axis=2)
+        cleared = full.sum(axis=1)
+        # stable sort moves the full rows to the top keeping the order of the others, then they get emptied
+        order = np.argsort(~full, axis=1, kind='stable')
+        fields = np.take_along_axis(fields, order[:, :, None], axis=1)
+        fields[np.arange(self.size_y) < cleared[:, None]] = 0
+        self.contents[idx] = fields
+
+        self._spawn(idx)
+        self.next_kind[idx], self.next_x[idx] = self._random_blocks(len(idx))
+        self.topped_out[idx] |= ~self._fits(idx, self.kind[idx], self.rotation[idx], self.x[idx], self.y[idx])
+
+        result = np.zeros(self.count, dtype=np.int64)
+        result[idx] = cleared
+        return result
+
+    def _spawn(self, idx: np.ndarray):
+        self.kind[idx] = self.next_kind[idx]
+        self.rotation[idx] = 0
+        self.x[idx] = self.next_x[idx]
+        self.y[idx] = _SPAWN_Y[self.kind[idx]]
+
+    def _random_blocks(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self._rng.integers(0, len(Board.BLOCKS), count), self._rng.integers(3, 6, count)
+
+    def _tiles(self, kind, rotation, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        shapes = _SHAPES[kind, rotation]
+        return shapes[:, :, 0] + x[:, None], shapes[:, :, 1] + y[:, None]
+
+    def _fits(self, idx, kind, rotation, x, y) -> np.ndarray:
+        xs, ys = self._tiles(kind, rotation, x, y)
+        inside = (xs >= 0) & (xs < self.size_x) & (ys >= 0) & (ys < self.size_y)
+        free = self.contents[idx[:, None],
+                             np.clip(ys, 0, self.size_y - 1),
+                             np.clip(xs, 0, self.size_x - 1)] == 0
+        return (inside & free).all(axis=1)
+
+    def _indices(self, mask: Optional[np.ndarray]) -> np.ndarray:
+        return np.arange(self.count) if mask is None else np.flatnonzero(mask)
+
+    def _scatter(self, idx: np.ndarray, values: np.ndarray) -> np.ndarray:
+        result = np.zeros(self.count, dtype=bool)
+        result[idx] = values
+        return result
@@ -0,0 +1,286 @@
+"""
+Rendering and engine benchmarks, run with: python -m src.benchmarks
+"""
+from __future__ import annotations
+from typing import *
+
+import argparse
+import curses
+import io
+import os
+import random
+import struct
+import sys
+import time
+
+import src.settings as settings
+from src.board import Board
+from src.drawables import BoardDrawable
+from src.engines import ENGINES, create_board
+from src.headless import HeadlessGame, random_bot_source
+from src.ansi import AnsiScreen
+from src.palette import color_pair, init_curses
+from src.randomizer import create_generator
+from src.renderer import Renderer, CursesRenderer, AnsiRenderer
+from src.virtualscreen import VirtualScreen
+from src.windows import GameActiveWindow
+
+SCREEN_SIZE = (24, 80)  # lines, columns
+
+
+class PerTileBoard:
+    """
+    How BoardDrawable used to draw: every tile, on every frame, one call each
+    """
+
+    def __init__(self, screen, x: int, y: int, board: Board):
+        self._screen = screen
+        self.x = x
+        self.y = y
+        self._board = board
+
+    def draw(self) -> None:
+        piece = self._board.piece
+        tiles = set(piece.tiles)
+        for col_i, col in enumerate(self._board.contents):
+            for row_i, field in enumerate(col):
+                if (col_i, row_i) in tiles:
+                    field = piece.color
+                if field:
+                    self._screen.addstr(self.y + row_i, self.x + 2 * col_i, '  ',
+                                        color_pair(field) | curses.A_BOLD)
+                else:
+                    self._screen.addch(self.y + row_i, self.x + 2 * col_i + 1, '.',
+                                       color_pair(10) | curses.A_BOLD)
+
+
+def bench_board_calls(drawable_class: Callable, frames: int = 5000, seed: int = 0) -> Tuple[float, float]:
+    """
+    Plays a seeded random bot game and draws the board after every action
+    :return: average curses calls and microseconds per frame
+    """
+    game = HeadlessGame(generator=create_generator('bag', seed))
+    screen = VirtualScreen(SCREEN_SIZE)
+    drawable = drawable_class(screen, 0, 0, game.board)
+    source = random_bot_source(seed)
+    elapsed = 0.
+    for _ in range(frames):
+        game.handle_action(next(source))
+        if game.ended:
+            game.reset()
+            drawable = drawable_class(screen, 0, 0, game.board)
+        start = time.perf_counter()
+        drawable.draw()
+        elapsed += time.perf_counter() - start
+    return sum(screen.calls.values()) / frames, elapsed / frames * 1e6
+
+
+def bench_engine(engine: str, pieces: int = 20000, track_features: bool = True, seed: int = 0) -> float:
+    """
+    Rotates, shifts and drops pieces straight on the board, the moves are drawn up front so
+    only the engine is timed; a fresh board is started on top out
+    :return: pieces placed per second
+    """
+    rng = random.Random(seed)
+    moves = [(rng.randint(0, 3), rng.choice('we'), rng.randint(0, 5)) for _ in range(pieces)]
+    generator = create_generator('bag', seed)
+    board = create_board(*settings.BOARD_SIZE, engine=engine, generator=generator, track_features=track_features)
+    start = time.perf_counter()
+    for rotations, direction, shifts in moves:
+        for _ in range(rotations):
+            board.rotate_block('r')
+        for _ in range(shifts):
+            board.move_block(direction)
+        board.hard_drop()
+        board.place_block()
+        if board.topped_out:
+            board = create_board(*settings.BOARD_SIZE, engine=engine, generator=generator,
+                                 track_features=track_features)
+    return pieces / (time.perf_counter() - start)
+
+
+def gravity_bot_source(seed: Optional[int] = None) -> Iterator[str]:
+    """
+    Like random_bot_source, but lets every piece fall a few rows before dropping it, as a player would
+    """
+    rng = random.Random(seed)
+    while True:
+        yield from ['rotate'] * rng.randint(0, 3)
+        yield from [rng.choice(('left', 'right'))] * rng.randint(0, 5)
+        yield from ['tick'] * rng.randint(0, 8)
+        yield 'drop'
+
+
+class WindowScenario:
+    """
+    Seeded bot games shown in a GameActiveWindow, a new game (and window) starting on every top out
+    """
+
+    def __init__(self, screen, renderer_class: Type[Renderer], seed: int = 0):
+        self._screen = screen
+        self._renderer_class = renderer_class
+        self._generator = create_generator('bag', seed)
+        self._source = gravity_bot_source(seed)
+        self._new_game()
+
+    def _new_game(self):
+        self.game = HeadlessGame(generator=self._generator)
+        self.window = GameActiveWindow(self._screen, self.game.board, self.game.stats)
+        self.renderer = self._renderer_class(self._screen, self.window)
+
+    def advance(self):
+        self.game.handle_action(next(self._source))
+        if self.game.ended:
+            self._new_game()
+
+    def step(self):
+        self.advance()
+        self.renderer.draw_frame()
+
+
+def bench_window_draw(frames: int = 5000, seed: int = 0) -> Tuple[float, float]:
+    """
+    Times GameActiveWindow.draw on a virtual screen
+    :return: average calls to the screen and microseconds per frame, first frame excluded
+    """
+    screen = VirtualScreen(SCREEN_SIZE)
+    scenario = WindowScenario(screen, AnsiRenderer, seed)
+    scenario.window.draw()
+    screen.calls.clear()
+    elapsed = 0.
+    for _ in range(frames):
+        scenario.advance()
+        start = time.perf_counter()
+        scenario.window.draw()
+        elapsed += time.perf_counter() - start
+    return sum(screen.calls.values()) / frames, elapsed / frames * 1e6
+
+
+def bench_ansi_backend(frames: int = 5000, seed: int = 0) -> Tuple[float, float]:
+    """
+    :return: average bytes written to the terminal and microseconds per frame, first frame excluded
+    """
+    screen = AnsiScreen(io.StringIO(), SCREEN_SIZE)
+    scenario = WindowScenario(screen, AnsiRenderer, seed)
+    scenario.renderer.draw_frame()
+    screen.bytes_written = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        scenario.step()
+    return screen.bytes_written / frames, (time.perf_counter() - start) / frames * 1e6
+
+
+def bench_curses_backend(frames: int = 5000, seed: int = 0) -> Tuple[float, float]:
+    """
+    Same as bench_ansi_backend, but through curses on a pseudo terminal
+    :return: average bytes written to the terminal and microseconds per frame, first frame excluded
+    """
+    setup_bytes, _ = _run_curses_in_pty(0, seed)
+    total_bytes, elapsed = _run_curses_in_pty(frames, seed)
+    return (total_bytes - setup_bytes) / frames, elapsed / frames * 1e6
+
+
+def _run_curses_in_pty(frames: int, seed: int) -> Tuple[int, float]:
+    import fcntl
+    import pty
+    import termios
+
+    read_fd, write_fd = os.pipe()
+    pid, master = pty.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            fcntl.ioctl(0, termios.TIOCSWINSZ, struct.pack('HHHH', *SCREEN_SIZE, 0, 0))
+            os.environ['TERM'] = 'xterm-256color'  # independent of the terminal running the benchmark
+            os.write(write_fd, repr(curses.wrapper(_curses_frames, frames, seed)).encode())
+        except Exception as e:
+            os.write(write_fd, f'{type(e).__name__}: {e}'.encode())
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    written = 0
+    while True:
+        try:
+            chunk = os.read(master, 65536)
+        except OSError:  # the child closed the terminal
+            break
+        if not chunk:
+            break
+        written += len(chunk)
+    os.waitpid(pid, 0)
+    os.close(master)
+    with os.fdopen(read_fd) as result:
+        report = result.read()
+    try:
+        return written, float(report)
+    except ValueError:
+        raise RuntimeError(f'curses benchmark failed: {report}')
+
+
+def _curses_frames(screen, frames: int, seed: int) -> float:
+    init_curses()
+    scenario = WindowScenario(screen, CursesRenderer, seed)
+    scenario.renderer.draw_frame()
+    start = time.perf_counter()
+    for _ in range(frames):
+        scenario.step()
+    return time.perf_counter() - start
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Rendering and engine benchmarks')
+    parser.add_argument('--frames', type=int, default=5000)
+    parser.add_argument('--no-curses', action='store_true',
+                        help='skip the benchmark needing a pseudo terminal')
+    parser.add_argument('--max-calls', type=float, default=None,
+                        help='fail if GameActiveWindow.draw averages more screen calls per frame')
+    parser.add_argument('--max-us', type=float, default=None,
+                        help='fail if GameActiveWindow.draw averages more microseconds per frame')
+    parser.add_argument('--pieces', type=int, default=20000,
+                        help='pieces placed by every engine benchmark')
+    parser.add_argument('--min-engine-ratio', type=float, default=None,
+                        help='fail if the bitboard engine places fewer times as many pieces per second as the list one')
+    parsed = parser.parse_args(args[1:])
+    frames = parsed.frames
+
+    print(f"board {settings.BOARD_SIZE[0]}x{settings.BOARD_SIZE[1]}, one frame per bot action")
+    for name, drawable_class in (('per tile (old)', PerTileBoard), ('run-length', BoardDrawable)):
+        calls, micros = bench_board_calls(drawable_class, frames)
+        print(f"{name:16} {calls:7.1f} calls/frame {micros:8.1f} us/frame")
+
+    print(f"\nGameActiveWindow on a {SCREEN_SIZE[1]}x{SCREEN_SIZE[0]} screen, bot letting pieces fall")
+    window_calls, window_micros = bench_window_draw(frames)
+    print(f"{'draw':16} {window_calls:7.1f} calls/frame {window_micros:8.1f} us/frame")
+    backends = (('ansi', bench_ansi_backend),) if parsed.no_curses \
+        else (('curses', bench_curses_backend), ('ansi', bench_ansi_backend))
+    for name, bench in backends:
+        written, micros = bench(frames)
+        print(f"{name:16} {written:7.1f} bytes/frame {micros:8.1f} us/frame")
+
+    print(f"\nengines, {parsed.pieces} pieces rotated, shifted and dropped")
+    engine_rates = {}
+    for engine in ENGINES:
+        for track_features in (True, False):
+            rate = bench_engine(engine, parsed.pieces, track_features)
+            engine_rates[engine, track_features] = rate
+            print(f"{engine + (' features' if track_features else ''):18} {rate:7.0f} pieces/s")
+
+    failed = False
+    if parsed.max_calls is not None and window_calls > parsed.max_calls:
+        print(f"draw makes {window_calls:.1f} calls/frame, more than {parsed.max_calls}", file=sys.stderr)
+        failed = True
+    if parsed.max_us is not None and window_micros > parsed.max_us:
+        print(f"draw takes {window_micros:.1f} us/frame, more than {parsed.max_us}", file=sys.stderr)
+        failed = True
+    for track_features in (True, False):
+        ratio = engine_rates['bitboard', track_features] / engine_rates['list', track_features]
+        if parsed.min_engine_ratio is not None and ratio < parsed.min_engine_ratio:
+            print(f"bitboard engine{' with features' if track_features else ''} is {ratio:.2f}x as fast "
+                  f"as the list one, less than {parsed.min_engine_ratio}", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,357 @@
+from __future__ import annotations
+from typing import *
+
+from src.board import Board, _FIELDS
+from src.features import BoardFeatures, column_well
+from src.pieces import BOUNDS, COLORS, COLUMN_TOPS, KICKS, ROW_MASKS, Piece
+
+_BINARY_DIGITS = b'0' + b'1' * 255  # bytes.translate table: empty tile -> '0', any color -> '1'
+_MASK_KEYS = {}  # (size_x, size_y) -> per row, zobrist key of every row mask seen so far
+
+
+class BitBoard(Board):
+    """
+    Board engine storing every row as an integer bitmask (bit x set = tile occupied)
+    plus a row-major bytearray color plane. Collision, full-line checks, line clears,
+    landing rows, hashing and placement work on whole row masks instead of tiles.
+    """
+
+    def _init_contents(self, size_x: int, size_y: int):
+        self._size_x = size_x
+        self._size_y = size_y
+        self._full_row = (1 << size_x) - 1
+        self._rows = [0] * size_y
+        self._colors = bytearray(size_x * size_y)
+        # rows hold immutable ints, so copy-on-write only has to duplicate the containers
+        self._owns_rows = True
+        self._owns_colors = True
+        self._field_rows = None  # cached row_fields(), dropped whenever colors change
+        self._mask_keys = _MASK_KEYS.setdefault((size_x, size_y), [{} for _ in range(size_y)])
+
+    def _release_contents(self):
+        self._owns_rows = False
+        self._owns_colors = False
+
+    def _fits(self, kind: int, rotation: int, x: int, y: int) -> bool:
+        min_x, max_x, min_y, max_y = BOUNDS[kind][rotation]
+        if x + min_x < 0 or x + max_x >= self._size_x or y + min_y < 0 or y + max_y >= self._size_y:
+            return False
+        rows = self._rows
+        shift = x + min_x
+        for row, mask in ROW_MASKS[kind][rotation]:
+            if rows[y + row] & mask << shift:
+                return False
+        return True
+
+    def move_block(self, dir: str) -> bool:
+        piece = self.piece
+        kind, rotation = piece.kind, piece.rotation
+        x = piece.x + (-1 if dir == 'w' else 1 if dir == 'e' else 0)
+        y = piece.y + (-1 if dir == 'n' else 1 if dir == 's' else 0)
+        # _fits inlined, moves are the most frequent calls
+        min_x, max_x, min_y, max_y = BOUNDS[kind][rotation]
+        if x + min_x < 0 or x + max_x >= self._size_x or y + min_y < 0 or y + max_y >= self._size_y:
+            return False
+        rows = self._rows
+        shift = x + min_x
+        for row, mask in ROW_MASKS[kind][rotation]:
+            if rows[y + row] & mask << shift:
+                return False
+        self.piece = Piece.at(kind, rotation, x, y)
+        if self._journal is not None:
+            self._record(('move', piece, self.piece))
+        if self._observers:
+            self.notify()
+        return True
+
+    def rotate_block(self, dir: str) -> bool:
+        piece = self.piece
+        rotated = self._kick(piece, dir)
+        if rotated is None:
+            return False
+        self.piece = rotated
+        if self._journal is not None:
+            self._record(('move', piece, rotated))
+        if self._observers:
+            self.notify()
+        return True
+
+    def hard_drop(self) -> int:
+        piece = self.piece
+        distance = self._drop_distance(piece.kind, piece.rotation, piece.x, piece.y)
+        if distance:
+            self.piece = piece.moved(0, distance)
+            if self._journal is not None:
+                self._record(('move', piece, self.piece))
+            if self._observers:
+                self.notify()
+        return distance
+
+    def _kick(self, piece: Piece, dir: str) -> Optional[Piece]:
+        kind, x, y = piece.kind, piece.x, piece.y
+        rotation = (piece.rotation + (1 if dir == 'r' else -1)) % 4
+        min_x, max_x, min_y, max_y = BOUNDS[kind][rotation]
+        masks = ROW_MASKS[kind][rotation]
+        rows, size_x, size_y = self._rows, self._size_x, self._size_y
+        for x_offset, y_offset in KICKS[kind][piece.rotation][0 if dir == 'r' else 1]:
+            kick_x, kick_y = x + x_offset, y + y_offset
+            if kick_x + min_x < 0 or kick_x + max_x >= size_x or kick_y + min_y < 0 or kick_y + max_y >= size_y:
+                continue
+            shift = kick_x + min_x
+            for row, mask in masks:
+                if rows[kick_y + row] & mask << shift:
+                    break
+            else:
+                return Piece.at(kind, rotation, kick_x, kick_y)
+        return None
+
+    def _drop_distance(self, kind: int, rotation: int, x: int, y: int) -> int:
+        min_x, _, _, max_y = BOUNDS[kind][rotation]
+        rows = self._rows
+        shifted = [(y + row, mask << x + min_x) for row, mask in ROW_MASKS[kind][rotation]]
+        limit = self._size_y - 1 - max_y - y
+        # rows above the highest column are empty, the piece falls through them unchecked
+        distance = min(max(self._size_y - max(self.heights) - 1 - max_y - y, 0), limit)
+        while distance < limit:
+            for row, mask in shifted:
+                if rows[row + distance + 1] & mask:
+                    return distance
+            distance += 1
+        return distance
+
+    def place_block(self) -> int:
+        if self._journal is not None:
+            return super(BitBoard, self).place_block()  # records what undo needs
+        piece = self.piece
+        kind, rotation, piece_x, piece_y = piece.kind, piece.rotation, piece.x, piece.y
+        min_x, _, min_y, max_y = BOUNDS[kind][rotation]
+
+        self._own_derived()
+        self._own_storage()
+        rows, keys = self._rows, self._mask_keys
+        board_hash = self.hash
+        for row, mask in ROW_MASKS[kind][rotation]:
+            y = piece_y + row
+            mask <<= piece_x + min_x
+            rows[y] |= mask
+            key = keys[y].get(mask)
+            board_hash ^= self._mask_key(y, mask) if key is None else key
+        self.hash = board_hash
+        colors, w, color = self._colors, self._size_x, COLORS[kind]
+        for x, y in piece.tiles:
+            colors[y * w + x] = color
+        self._field_rows = None
+
+        heights, size_y = self.heights, self._size_y
+        for column, top in COLUMN_TOPS[kind][rotation]:
+            x = piece_x + column
+            height = size_y - piece_y - top
+            if height > heights[x]:
+                self._aggregate_height += height - heights[x]
+                heights[x] = height
+        self._filled += len(piece.tiles)
+        lines_to_check = range(piece_y + min_y, piece_y + max_y + 1)
+        if self._track_features:
+            columns = [piece_x + column for column, _ in COLUMN_TOPS[kind][rotation]]
+            self._update_columns(columns)
+            self._update_rows(lines_to_check)
+            self._update_surface(columns)
+
+        self.piece = self.next_piece
+        self.next_piece = Piece.spawn(*self._get_random_block())
+        full_row = self._full_row
+        cleared_rows = [y for y in lines_to_check if rows[y] == full_row]
+        if cleared_rows:
+            self._clear_rows(cleared_rows)
+        if not self._fits(self.piece.kind, 0, self.piece.x, self.piece.y):
+            self.topped_out = True
+        if self._observers:
+            self.notify(cleared_rows=cleared_rows)
+        return len(cleared_rows)
+
+    def _mask_key(self, y: int, mask: int) -> int:
+        # zobrist key of a whole row mask, the xor of its tiles' keys, memoized per board size
+        key = 0
+        bits = mask
+        while bits:
+            low = bits & -bits
+            key ^= self._zobrist[low.bit_length() - 1][y]
+            bits ^= low
+        self._mask_keys[y][mask] = key
+        return key
+
+    def _own_storage(self):
+        if not self._owns_rows:
+            self._rows = self._rows[:]
+            self._owns_rows = True
+        if not self._owns_colors:
+            self._colors = self._colors[:]
+            self._owns_colors = True
+
+    def _write_tiles(self, tiles, color: int):
+        self._own_storage()
+        self._field_rows = None
+        for x, y in tiles:
+            self._rows[y] |= 1 << x
+            self._colors[y * self._size_x + x] = color
+
+    def _erase_tiles(self, tiles):
+        self._own_storage()
+        self._field_rows = None
+        for x, y in tiles:
+            self._rows[y] &= ~(1 << x)
+            self._colors[y * self._size_x + x] = 0
+
+    def _row_cells(self, idx: int) -> bytes:
+        return bytes(self._colors[idx * self._size_x:(idx + 1) * self._size_x])
+
+    def check_line_full(self, idx: int) -> bool:
+        return self._rows[idx] == self._full_row
+
+    def _remove_rows(self, rows: List[int]):
+        bottom = rows[-1] + 1
+        kept = [y for y in range(bottom) if y not in rows]
+        w = self._size_x
+        colors = self._colors
+        self._rows = [0] * len(rows) + [self._rows[y] for y in kept] + self._rows[bottom:]
+        self._colors = bytearray(len(rows) * w) + b''.join([colors[y * w:(y + 1) * w] for y in kept]) \
+            + colors[bottom * w:]
+        self._owns_rows = True
+        self._owns_colors = True
+        self._field_rows = None
+
+    def _insert_rows(self, rows: List[int], cells: List[bytes]):
+        bottom = rows[-1] + 1
+        w = self._size_x
+        removed = dict(zip(rows, cells))
+        kept = iter(range(len(rows), bottom))
+        new_rows = []
+        new_colors = bytearray()
+        for y in range(bottom):
+            if y in removed:
+                new_rows.append(self._full_row)  # only full rows get removed
+                new_colors += removed[y]
+            else:
+                src = next(kept)
+                new_rows.append(self._rows[src])
+                new_colors += self._colors[src * w:(src + 1) * w]
+        self._rows = new_rows + self._rows[bottom:]
+        self._colors = new_colors + self._colors[bottom * w:]
+        self._owns_rows = True
+        self._owns_colors = True
+        self._field_rows = None
+
+    def _column_height(self, x: int) -> int:
+        for y, row in enumerate(self._rows):
+            if row >> x & 1:
+                return self._size_y - y
+        return 0
+
+    def _init_features(self, size_x: int, size_y: int):
+        super(BitBoard, self)._init_features(size_x, size_y)
+        # indexed by row here: filled/empty changes between row y and the one below it (the floor
+        # for the last row), one popcount each, so only the terms around changed rows need updating
+        self._column_transitions = [0] * (size_y - 1) + [size_x]
+
+    def _update_columns(self, columns: Iterable[int]):
+        pass  # column transitions are kept per row, see _update_rows
+
+    def _update_rows(self, rows: Iterable[int]):
+        super(BitBoard, self)._update_rows(rows)
+        pairs = set()
+        for y in rows:
+            pairs.add(y - 1)
+            pairs.add(y)
+        self._update_row_pairs(pairs)
+
+    def _clear_rows(self, rows: List[int]):
+        super(BitBoard, self)._clear_rows(rows)
+        if self._track_features:
+            # every row above the lowest cleared one moved down
+            self._update_row_pairs(range(rows[-1] + 1))
+
+    def _update_row_pairs(self, pairs: Iterable[int]):
+        masks = self._rows + [self._full_row]  # the floor
+        transitions = self._column_transitions
+        for y in pairs:
+            if y >= 0:
+                pair = bin(masks[y] ^ masks[y + 1]).count('1')
+                self._column_transitions_sum += pair - transitions[y]
+                transitions[y] = pair
+
+    def _row_transitions_at(self, y: int) -> int:
+        # walls on both sides count as filled
+        walled = self._rows[y] << 1 | 1 | 1 << self._size_x + 1
+        return bin((walled ^ walled >> 1) & (1 << self._size_x + 1) - 1).count('1')
+
+    def _colors_row_major(self) -> bytes:
+        return bytes(self._colors)
+
+    def _load_colors(self, colors: bytes):
+        w = self._size_x
+        self._colors = bytearray(colors)
+        # as one string of binary digits, reversed so that row y, column x ends up as bit y * w + x
+        tiles = int(bytes(colors).translate(_BINARY_DIGITS)[::-1], 2)
+        full_row = self._full_row
+        self._rows = [tiles >> y * w & full_row for y in range(self._size_y)]
+        self._owns_rows = True
+        self._owns_colors = True
+        self._field_rows = None
+
+    def _hash_rows(self, start: int, stop: int) -> int:
+        result = 0
+        keys = self._mask_keys
+        for y in range(start, stop):
+            row = self._rows[y]
+            if row:
+                key = keys[y].get(row)
+                result ^= self._mask_key(y, row) if key is None else key
+        return result
+
+    def _compute_features(self) -> BoardFeatures:
+        # from the row masks, like the incremental terms; heights are always up to date
+        rows, heights = self._rows, self.heights
+        size_x = self._size_x
+        holes = 0
+        covered = 0  # columns with a tile above the current row
+        column_transitions = bin(rows[-1] ^ self._full_row).count('1')
+        row_transitions = 0
+        previous = 0
+        walls = 1 | 1 << size_x + 1
+        inner = (1 << size_x + 1) - 1
+        for row in rows:
+            covered |= row
+            holes += bin(covered & ~row).count('1')
+            column_transitions += bin(previous ^ row).count('1')
+            previous = row
+            walled = row << 1 | walls
+            row_transitions += bin((walled ^ walled >> 1) & inner).count('1')
+        column_transitions -= bin(rows[0]).count('1')  # the first row has nothing above it to change from
+        wells = sum(column_well(heights, x) for x in range(size_x))
+        bumpiness = sum(abs(heights[x] - heights[x + 1]) for x in range(size_x - 1))
+        return BoardFeatures(sum(heights), holes, row_transitions, column_transitions, wells, bumpiness)
+
+    def row_fields(self) -> List[Tuple[Optional[int], ...]]:
+        if self._field_rows is None:
+            w = self._size_x
+            fields = [_FIELDS[color] for color in self._colors]
+            self._field_rows = [tuple(fields[start:start + w]) for start in range(0, len(fields), w)]
+        return self._field_rows[:]
+
+    @property
+    def rows(self) -> List[int]:
+        return self._rows
+
+    @property
+    def contents(self) -> List[List[Optional[int]]]:
+        # column-major view matching Board.contents, built on demand for renderers
+        w = self._size_x
+        return [[self._colors[y * w + x] or None for y in range(self._size_y)] for x in range(w)]
+
+    @property
+    def size_x(self) -> int:
+        return self._size_x
+
+    @property
+    def size_y(self) -> int:
+        return self._size_y
@@ -1,102 +1,509 @@
 from __future__ import annotations
 from typing import *
 
-import random
-
 from src.observers import Observable
+from src.pieces import BLOCKS, COLORS, SHAPES, KICKS, BOUNDS, Piece
+from src.zobrist import zobrist_keys
+from src.features import BoardFeatures, column_well, compute_features
+from src.randomizer import PieceGenerator, UniformGenerator
+
+_FIELDS = [None] + list(range(1, 256))  # Board.contents entry of each color index
 
 
 class Board(Observable):
-    BLOCKS = (
-        [(pos, 0) for pos in range(4)],  # cyan
-        [(pos, 1) for pos in range(3)] + [(0, 0)],  # blue
-        [(pos, 1) for pos in range(3)] + [(2, 0)],  # orange
-        [(0, 0), (0, 1), (1, 0), (1, 1)],  # yellow
-        [(1, 0), (2, 0), (0, 1), (1, 1)],  # green
-        [(pos, 1) for pos in range(3)] + [(1, 0)],  # purple
-        [(0, 0), (1, 0), (1, 1), (2, 1)]  # red
-    )
-    # c, b, o, y, g, p, r
-    COLORS = list(range(11, 18))
-
-    def __init__(self, size_x, size_y):
+    BLOCKS = BLOCKS
+    COLORS = COLORS
+
+    def __init__(self, size_x, size_y, generator: Optional[PieceGenerator] = None, track_features: bool = True):
+        """
+        Inits class Board
+        :param generator: source of the pieces, a UniformGenerator if None
+        :param track_features: keep the features up to date on every placement; when False they
+            are computed from scratch on access, which is cheaper for bulk simulation
+        """
         super(Board, self).__init__()
-        self.contents = [[None for _ in range(size_y)] for _ in range(size_x)]
-        self.newblock_tiles, self.newblock_color, self.newblock_pivot = self._get_random_block()
-        self.nextblock_tiles, self.nextblock_color, self.nextblock_pivot = self._get_random_block()
+        self.generator = generator or UniformGenerator()
+        self._track_features = track_features
+        self._init_contents(size_x, size_y)
+        self.heights = [0] * size_x
+        self._zobrist = zobrist_keys(size_x, size_y)
+        self.hash = 0  # zobrist hash of the occupied tiles
+        self._init_features(size_x, size_y)
+        self.piece = Piece.spawn(*self._get_random_block())
+        self.next_piece = Piece.spawn(*self._get_random_block())
+        self.topped_out = False
+        self._journal = None  # undo entries, only recorded while journaling is enabled
+        self._redo = []
 
-    def move_block(self, dir: str) -> bool:  # n, s, w, e
-        x_offset = -1 if dir is 'w' else 1 if dir is 'e' else 0
-        y_offset = -1 if dir is 'n' else 1 if dir is 's' else 0
-        new_position = [(x + x_offset, y + y_offset) for x, y in self.newblock_tiles]
-        if not self._validate_position(new_position):
+    @classmethod
+    def _from_state(cls, size_x: int, size_y: int, colors: bytes, piece: Piece, next_piece: Piece,
+                    topped_out: bool, generator: PieceGenerator, heights: Optional[List[int]] = None,
+                    board_hash: Optional[int] = None, track_features: bool = True) -> Board:
+        """
+        Rebuilds a saved board, bypassing __init__, which would draw pieces and set up state that gets replaced
+        :param colors: color index of every tile row by row, 0 if empty
+        :param heights: stored column heights, recomputed from the tiles if None
+        :param board_hash: stored zobrist hash, recomputed from the tiles if None
+        :param track_features: see __init__; when False the playfield is not scanned for them
+        """
+        board = object.__new__(cls)
+        Observable.__init__(board)
+        board.generator = generator
+        board._track_features = track_features
+        board._init_contents(size_x, size_y)
+        board._load_colors(colors)
+        board.heights = heights if heights is not None else [board._column_height(x) for x in range(size_x)]
+        board._zobrist = zobrist_keys(size_x, size_y)
+        board.hash = board_hash if board_hash is not None else board._hash_rows(0, size_y)
+        board._init_features(size_x, size_y)
+        board._aggregate_height = sum(board.heights)
+        if track_features:
+            board._rebuild_features()
+        board.piece = piece
+        board.next_piece = next_piece
+        board.topped_out = topped_out
+        board._journal = None
+        board._redo = []
+        return board
+
+    def _init_contents(self, size_x: int, size_y: int):
+        self.contents = [[None] * size_y for _ in range(size_x)]
+        # copy-on-write bookkeeping, see fork()
+        self._owns_contents = True
+        self._owned_columns = (1 << size_x) - 1  # bitmask of columns safe to modify in place
+
+    def _init_features(self, size_x: int, size_y: int):
+        # per column/row terms of the features, their sums are kept up to date alongside
+        self._column_transitions = [1] * size_x  # empty column meets the floor
+        self._row_transitions = [2] * size_y  # empty row meets both walls
+        self._column_wells = [0] * size_x
+        self._column_bumps = [0] * (size_x - 1)
+        self._aggregate_height = 0
+        self._filled = 0  # occupied tiles; every tile below a column's top that is not one is a hole
+        self._column_transitions_sum = size_x
+        self._row_transitions_sum = 2 * size_y
+        self._wells = 0
+        self._bumpiness = 0
+        self._owns_derived = True
+
+    def fork(self) -> Board:
+        """
+        O(1) snapshot for search or speculative play. Both boards share their storage until one
+        of them writes to it; then only the touched columns (or rows) get copied. Observers are not
+        carried over and the piece generator is duplicated, so both boards deal the same pieces.
+        """
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._observers = []
+        clone.generator = self.generator.fork()
+        clone._journal = None
+        clone._redo = []
+        for board in (self, clone):
+            board._release_contents()
+            board._owns_derived = False
+        return clone
+
+    def _release_contents(self):
+        self._owns_contents = False
+        self._owned_columns = 0
+
+    def _own_derived(self):
+        if self._owns_derived:
+            return
+        self.heights = self.heights[:]
+        self._column_transitions = self._column_transitions[:]
+        self._row_transitions = self._row_transitions[:]
+        self._column_wells = self._column_wells[:]
+        self._column_bumps = self._column_bumps[:]
+        self._owns_derived = True
+
+    def _share_derived(self) -> Tuple:
+        # snapshot of the derived state; the lists get copied before their next modification
+        self._owns_derived = False
+        return (self.heights, self._column_transitions, self._row_transitions,
+                self._column_wells, self._column_bumps, self._aggregate_height, self._filled,
+                self._column_transitions_sum, self._row_transitions_sum, self._wells, self._bumpiness, self.hash)
+
+    def _restore_derived(self, derived: Tuple):
+        (self.heights, self._column_transitions, self._row_transitions,
+         self._column_wells, self._column_bumps, self._aggregate_height, self._filled,
+         self._column_transitions_sum, self._row_transitions_sum, self._wells, self._bumpiness, self.hash) = derived
+        self._owns_derived = False
+
+    def enable_journal(self):
+        """
+        Starts recording moves and placements, so they can be undone and redone
+        """
+        if self._journal is None:
+            self._journal = []
+            self._redo = []
+
+    def disable_journal(self):
+        self._journal = None
+        self._redo = []
+
+    @property
+    def journaling(self) -> bool:
+        return self._journal is not None
+
+    def _record(self, entry: Tuple):
+        self._journal.append(entry)
+        if self._redo:
+            self._redo = []
+
+    def undo(self) -> bool:
+        """
+        Reverts the last recorded move or placement
+        :return: False if there was nothing to undo
+        """
+        if not self._journal:
             return False
-        self.newblock_tiles = new_position
-        self.newblock_pivot[0] += x_offset
-        self.newblock_pivot[1] += y_offset
+        entry = self._journal.pop()
+        if entry[0] == 'move':
+            self.piece = entry[1]
+        else:
+            _, piece, next_piece, drawn, topped_out, derived, cleared_rows, cleared_cells = entry
+            if cleared_rows:
+                self._insert_rows(cleared_rows, cleared_cells)
+            self._erase_tiles(piece.tiles)
+            self._restore_derived(derived)
+            self.generator.push_back(drawn)
+            self.piece = piece
+            self.next_piece = next_piece
+            self.topped_out = topped_out
+        self._redo.append(entry)
         self.notify()
         return True
 
-    def rotate_block(self, dir: str) -> bool:  # l, r
-        if self.newblock_color == 14:
-            return True  # yellow block does not rotate
+    def redo(self) -> bool:
+        """
+        Repeats the last undone move or placement
+        :return: False if there was nothing to redo
+        """
+        if not self._redo or self._journal is None:
+            return False
+        entry = self._redo.pop()
+        pending, self._redo = self._redo, []
+        if entry[0] == 'move':
+            self.piece = entry[2]
+            self._record(entry)
+            self.notify()
+        else:
+            self.piece = entry[1]
+            self.place_block()  # the generator deals the same piece again, it was pushed back on undo
+        self._redo = pending
+        return True
 
-        # relative to block's upper left tile
-        p_x, p_y = self.newblock_pivot
+    def _writable_column(self, x: int) -> List[Optional[int]]:
+        if not self._owned_columns >> x & 1:
+            if not self._owns_contents:
+                self.contents = self.contents[:]
+                self._owns_contents = True
+            self.contents[x] = self.contents[x][:]
+            self._owned_columns |= 1 << x
+        return self.contents[x]
 
-        dir = 1 if dir == 'r' else -1
-        rotated = [((p_y - y) * dir + p_x,
-                    (-1 if self.newblock_color == 11 else 1) * (x - p_x) * dir + p_y)
-                   for x, y in self.newblock_tiles]
-        if not self._validate_position(rotated):
+    def move_block(self, dir: str) -> bool:  # n, s, w, e
+        piece = self.piece
+        x = piece.x + (-1 if dir == 'w' else 1 if dir == 'e' else 0)
+        y = piece.y + (-1 if dir == 'n' else 1 if dir == 's' else 0)
+        if not self._fits(piece.kind, piece.rotation, x, y):
             return False
+        self.piece = Piece.at(piece.kind, piece.rotation, x, y)
+        if self._journal is not None:
+            self._record(('move', piece, self.piece))
+        self.notify()
+        return True
+
+    def hard_drop(self) -> int:
+        """
+        Moves the block down as far as it goes with a single notification
+        :return: number of rows the block travelled
+        """
+        piece = self.piece
+        distance = self._drop_distance(piece.kind, piece.rotation, piece.x, piece.y)
+        if distance:
+            self.piece = piece.moved(0, distance)
+            if self._journal is not None:
+                self._record(('move', piece, self.piece))
+            self.notify()
+        return distance
+
+    def _drop_distance(self, kind: int, rotation: int, x: int, y: int) -> int:
+        size_y, heights = self.size_y, self.heights
+        distance = size_y
+        for tile_x, tile_y in SHAPES[kind][rotation]:
+            gap = size_y - heights[x + tile_x] - 1 - (y + tile_y)
+            if gap < 0:
+                # tucked below an overhang, the skyline says nothing about what's underneath
+                distance = 0
+                while self._fits(kind, rotation, x, y + distance + 1):
+                    distance += 1
+                return distance
+            distance = min(distance, gap)
+        return distance
 
-        self.newblock_tiles = rotated
+    def rotate_block(self, dir: str) -> bool:  # l, r
+        piece = self.piece
+        rotated = self._kick(piece, dir)
+        if rotated is None:
+            return False
+        self.piece = rotated
+        if self._journal is not None:
+            self._record(('move', piece, rotated))
+        self.notify()
         return True
 
-    def _validate_position(self, new_position) -> bool:
-        if any([x not in range(0, self.size_x) or
-                y not in range(0, self.size_y)
-                for x, y in new_position]):
+    def _kick(self, piece: Piece, dir: str) -> Optional[Piece]:
+        kind, x, y = piece.kind, piece.x, piece.y
+        rotation = (piece.rotation + (1 if dir == 'r' else -1)) % 4
+        for x_offset, y_offset in KICKS[kind][piece.rotation][0 if dir == 'r' else 1]:
+            if self._fits(kind, rotation, x + x_offset, y + y_offset):
+                return Piece.at(kind, rotation, x + x_offset, y + y_offset)
+        return None
+
+    def _fits(self, kind: int, rotation: int, x: int, y: int) -> bool:
+        min_x, max_x, min_y, max_y = BOUNDS[kind][rotation]
+        if x + min_x < 0 or x + max_x >= self.size_x or y + min_y < 0 or y + max_y >= self.size_y:
             return False
-        return not any([self.contents[x][y] is not None
-                        for x, y in new_position])
+        contents = self.contents
+        for tile_x, tile_y in SHAPES[kind][rotation]:
+            if contents[x + tile_x][y + tile_y] is not None:
+                return False
+        return True
 
     def place_block(self) -> int:
-        lines_to_check = range(min(y for _, y in self.newblock_tiles), max(y for _, y in self.newblock_tiles)+1)
+        piece, next_piece = self.piece, self.next_piece
+        tiles = piece.tiles
+        lines_to_check = range(min(y for _, y in tiles), max(y for _, y in tiles) + 1)
 
-        for x, y in self.newblock_tiles:
-            self.contents[x][y] = self.newblock_color
-        self.newblock_tiles = self.nextblock_tiles
-        self.newblock_pivot = self.nextblock_pivot
-        self.newblock_color = self.nextblock_color
+        derived = self._share_derived() if self._journal is not None else None
+        self._own_derived()
+        self._write_tiles(tiles, piece.color)
+        for x, y in tiles:
+            if self.size_y - y > self.heights[x]:
+                self._aggregate_height += self.size_y - y - self.heights[x]
+                self.heights[x] = self.size_y - y
+            self.hash ^= self._zobrist[x][y]
+        self._filled += len(tiles)
+        if self._track_features:
+            columns = {x for x, _ in tiles}
+            self._update_columns(columns)
+            self._update_rows(lines_to_check)
+            self._update_surface(columns)
+        drawn = self._get_random_block()
+        self.piece = next_piece
+        self.next_piece = Piece.spawn(*drawn)
 
-        self.nextblock_tiles, self.nextblock_color, self.nextblock_pivot = self._get_random_block()
+        cleared_rows = [idx for idx in lines_to_check if self.check_line_full(idx)]
+        if self._journal is not None:
+            self._record(('place', piece, next_piece, drawn, self.topped_out, derived,
+                          cleared_rows, [self._row_cells(idx) for idx in cleared_rows]))
+        if cleared_rows:
+            self._clear_rows(cleared_rows)
 
-        cleared_lines = 0
-        for idx in lines_to_check:
-            if self.check_line_full(idx):
-                self.clear_line(idx)
-                cleared_lines += 1
+        if not self._fits(self.piece.kind, 0, self.piece.x, self.piece.y):
+            self.topped_out = True
 
-        self.notify()
+        self.notify(cleared_rows=cleared_rows)
+
+        return len(cleared_rows)
 
-        return cleared_lines
+    def _write_tiles(self, tiles, color: int):
+        for x, y in tiles:
+            self._writable_column(x)[y] = color
+
+    def _erase_tiles(self, tiles):
+        for x, y in tiles:
+            self._writable_column(x)[y] = None
+
+    def _row_cells(self, idx: int) -> List[Optional[int]]:
+        return [col[idx] for col in self.contents]
 
     def check_line_full(self, idx: int) -> bool:
         return not any(col[idx] is None for col in self.contents)
 
-    def clear_line(self, idx: int):
+    def clear_line(self, idx: int) -> bool:
+        """
+        Removes the row if it is full
+        :param idx: index of the row
+        :return: whether the row was cleared
+        """
+        return bool(self.clear_lines([idx]))
+
+    def clear_lines(self, rows: Iterable[int]) -> List[int]:
+        """
+        Removes all full rows among the given ones in a single compaction pass
+        :param rows: indices of the rows to check
+        :return: ascending indices of the cleared rows, as they were before clearing
+        """
+        full = [idx for idx in sorted(rows) if self.check_line_full(idx)]
+        if full:
+            self._clear_rows(full)
+        return full
+
+    def _clear_rows(self, rows: List[int]):
+        self._own_derived()
+        # only the rows between the top of the stack and the lowest cleared one change
+        top = self.size_y - max(self.heights)
+        bottom = rows[-1] + 1
+        self.hash ^= self._hash_rows(top, bottom)
+        self._remove_rows(rows)
+        self.hash ^= self._hash_rows(top, bottom)
+        cleared_top = self.size_y - rows[0]
+        for x, height in enumerate(self.heights):
+            # the rows were full, so each column's top was at or above the topmost one
+            self.heights[x] = height - len(rows) if height > cleared_top else self._column_height(x)
+        self._aggregate_height = sum(self.heights)
+        self._filled -= len(rows) * self.size_x
+        if not self._track_features:
+            return
+
+        # cleared rows were full (no transitions) and get replaced by empty ones at the top
+        self._row_transitions[:bottom] = [2] * len(rows) + [self._row_transitions[y]
+                                                            for y in range(bottom) if y not in rows]
+        self._row_transitions_sum += 2 * len(rows)
+        self._update_columns(range(self.size_x))
+        self._update_surface(range(self.size_x))
+
+    def _rebuild_features(self):
+        # recomputes the features from scratch after the contents were replaced, heights must be up to date
+        self._init_features(self.size_x, self.size_y)
+        self._aggregate_height = sum(self.heights)
+        self._filled = self.size_x * self.size_y - self._colors_row_major().count(0)
+        self._update_columns(range(self.size_x))
+        self._update_rows(range(self.size_y))
+        self._update_surface(range(self.size_x))
+
+    def _update_columns(self, columns: Iterable[int]):
+        for x in columns:
+            transitions = self._column_transitions_at(x)
+            self._column_transitions_sum += transitions - self._column_transitions[x]
+            self._column_transitions[x] = transitions
+
+    def _update_rows(self, rows: Iterable[int]):
+        for y in rows:
+            transitions = self._row_transitions_at(y)
+            self._row_transitions_sum += transitions - self._row_transitions[y]
+            self._row_transitions[y] = transitions
+
+    def _update_surface(self, columns: Iterable[int]):
+        heights = self.heights
+        last = self.size_x - 1
+        for x in columns:
+            for pair in (x - 1, x):
+                if 0 <= pair < last:
+                    bump = abs(heights[pair] - heights[pair + 1])
+                    self._bumpiness += bump - self._column_bumps[pair]
+                    self._column_bumps[pair] = bump
+            for neighbour in (x - 1, x, x + 1):
+                if 0 <= neighbour <= last:
+                    well = column_well(heights, neighbour)
+                    self._wells += well - self._column_wells[neighbour]
+                    self._column_wells[neighbour] = well
+
+    def _column_transitions_at(self, x: int) -> int:
+        # nothing above the top of the column can contribute
+        height = self.heights[x]
+        if not height:
+            return 1
+        col = self.contents[x]
+        top = self.size_y - height
+        transitions = 1 if top else 0
+        filled = True
+        for y in range(top + 1, self.size_y):
+            if (col[y] is not None) != filled:
+                filled = not filled
+                transitions += 1
+        return transitions + (not filled)
+
+    def _row_transitions_at(self, y: int) -> int:
+        transitions = 0
+        filled = True
         for col in self.contents:
-            del col[idx]
-            col.insert(0, None)
-
-    def _get_random_block(self) -> Tuple[List, str, List]:
-        pick = random.randint(0, 6)
-        x_offset = random.randint(3, 5)
-        pivot_x = min(x for x, _ in Board.BLOCKS[pick]) + 1 + x_offset
-        pivot_y = min(y for _, y in Board.BLOCKS[pick]) + 0 if Board.COLORS[pick] != 11 else 1
-        return [(x + x_offset, y) for x, y in Board.BLOCKS[pick]], Board.COLORS[pick], [pivot_x, pivot_y]
+            if (col[y] is not None) != filled:
+                filled = not filled
+                transitions += 1
+        return transitions + (not filled)
+
+    @property
+    def features(self) -> BoardFeatures:
+        if not self._track_features:
+            return self._compute_features()
+        return BoardFeatures(self._aggregate_height, self._aggregate_height - self._filled, self._row_transitions_sum,
+                             self._column_transitions_sum, self._wells, self._bumpiness)
+
+    def _compute_features(self) -> BoardFeatures:
+        return compute_features(self.contents)
+
+    def row_fields(self) -> List[Tuple[Optional[int], ...]]:
+        """
+        Row-major view of the contents for renderers, one tuple of color indices (None if empty) per row
+        """
+        return list(zip(*self.contents))
+
+    def _remove_rows(self, rows: List[int]):
+        # everything below the lowest cleared row stays put, the rest is rebuilt once per column
+        bottom = rows[-1] + 1
+        kept = [y for y in range(bottom) if y not in rows]
+        padding = [None] * len(rows)
+        # fresh lists, so shared columns don't need copying first
+        self.contents = [padding + [col[y] for y in kept] + col[bottom:] for col in self.contents]
+        self._owns_contents = True
+        self._owned_columns = (1 << self.size_x) - 1
+
+    def _insert_rows(self, rows: List[int], cells: List[List[Optional[int]]]):
+        # inverse of _remove_rows: drops the padding at the top and puts the removed rows back
+        bottom = rows[-1] + 1
+        removed = dict(zip(rows, cells))
+        contents = []
+        for x, col in enumerate(self.contents):
+            kept = iter(col[len(rows):bottom])
+            contents.append([removed[y][x] if y in removed else next(kept) for y in range(bottom)] + col[bottom:])
+        self.contents = contents
+        self._owns_contents = True
+        self._owned_columns = (1 << self.size_x) - 1
+
+    def _colors_row_major(self) -> bytes:
+        # color index of every tile row by row, 0 meaning empty
+        return bytes([col[y] or 0 for y in range(self.size_y) for col in self.contents])
+
+    def _load_colors(self, colors: bytes):
+        w = self.size_x
+        fields = [_FIELDS[color] for color in colors]
+        self.contents = [fields[x::w] for x in range(w)]
+        self._owns_contents = True
+        self._owned_columns = (1 << w) - 1
+
+    def _hash_rows(self, start: int, stop: int) -> int:
+        result = 0
+        for col, keys in zip(self.contents, self._zobrist):
+            for y in range(start, stop):
+                if col[y] is not None:
+                    result ^= keys[y]
+        return result
+
+    def state_key(self) -> Hashable:
+        """
+        Hashable identity of the occupied tiles (their zobrist hash), colors are ignored
+        """
+        return self.hash
+
+    def _column_height(self, x: int) -> int:
+        for y, field in enumerate(self.contents[x]):
+            if field is not None:
+                return self.size_y - y
+        return 0
+
+    def _get_random_block(self) -> Tuple[int, int]:
+        return self.generator.next()
+
+    def preview(self, count: int) -> List[int]:
+        """
+        Kinds of the blocks coming after the next one
+        :param count: number of blocks to look ahead
+        """
+        return [kind for kind, _ in self.generator.peek(count)]
 
     @property
     def size_x(self) -> int:
@@ -0,0 +1,147 @@
+from __future__ import annotations
+from typing import *
+
+import struct
+
+from src.board import Board
+from src.engines import ENGINES
+from src.pieces import SHAPES, Piece
+from src.randomizer import GENERATORS
+from src.stats import Stats
+
+# Layout (little endian):
+#   header      magic, version, engine, size_x, size_y
+#   pieces      current and next piece as kind, rotation, x, y; topped out flag
+#   generator   type, PRNG state, extra state (255 = None), queue length, then one byte per queued piece
+#   stats       score, lines, level
+#   derived     zobrist hash, then one byte per column height, so decoding doesn't rescan the playfield
+#   playfield   4 bits per tile row by row, high nibble first; 0 is empty, n is color 10 + n
+MAGIC = b'NT'
+VERSION = 2
+_HEADER = struct.Struct('<2sBBBB')
+_PIECES = struct.Struct('<BBbbBBbb?')
+_GENERATOR = struct.Struct('<BQBH')
+_STATS = struct.Struct('<qII')
+_HASH = struct.Struct('<Q')
+
+_ENGINE_IDS = {cls: idx for idx, cls in enumerate(ENGINES.values())}
+_ENGINE_CLASSES = list(ENGINES.values())
+_GENERATOR_IDS = {cls: idx for idx, cls in enumerate(GENERATORS.values())}
+_GENERATOR_CLASSES = list(GENERATORS.values())
+
+# bytes.translate tables between color indices and 4 bit codes
+_COLOR_TO_CODE = bytes(color - 10 if 10 < color < 26 else 0 for color in range(256))
+_CODE_TO_COLOR = bytes(code + 10 if code else 0 for code in range(16)) + bytes(240)
+_HIGH_NIBBLE = bytes(_CODE_TO_COLOR[byte >> 4] for byte in range(256))
+_LOW_NIBBLE = bytes(_CODE_TO_COLOR[byte & 15] for byte in range(256))
+_PIECE_KINDS = len(SHAPES)
+_QUEUE_ENTRIES = [(byte & 7, byte >> 3) for byte in range(256)]  # (kind, x) of a queued piece byte
+_VALID_QUEUE_BYTES = bytes(byte for byte in range(256) if byte & 7 < _PIECE_KINDS)
+
+
+class CodecError(ValueError):
+    pass
+
+
+def encode(board: Board, stats: Optional[Stats] = None) -> bytes:
+    """
+    Serializes the full game state into a compact binary frame
+    :param board: board to encode, including its pieces and piece generator
+    :param stats: stats to store alongside, zeros if None
+    """
+    rng_state, extra, queue = board.generator.checkpoint()
+    if extra is not None and not 0 <= extra < 255:
+        raise CodecError(f'Generator state {extra!r} does not fit the format')
+    piece, next_piece = board.piece, board.next_piece
+
+    codes = board._colors_row_major().translate(_COLOR_TO_CODE)
+    if len(codes) % 2:
+        codes += b'\0'
+    # even tiles go to the high nibbles; both halves are merged as big ints to stay in C
+    size = len(codes) // 2
+    playfield = ((int.from_bytes(codes[0::2], 'big') << 4) | int.from_bytes(codes[1::2], 'big')).to_bytes(size, 'big')
+
+    return b''.join((
+        _HEADER.pack(MAGIC, VERSION, _ENGINE_IDS[type(board)], board.size_x, board.size_y),
+        _PIECES.pack(piece.kind, piece.rotation, piece.x, piece.y,
+                     next_piece.kind, next_piece.rotation, next_piece.x, next_piece.y, board.topped_out),
+        _GENERATOR.pack(_GENERATOR_IDS[type(board.generator)], rng_state, 255 if extra is None else extra, len(queue)),
+        bytes(kind | x << 3 for kind, x in queue),
+        _STATS.pack(stats.score, stats.lines, stats.level) if stats else _STATS.pack(0, 0, 1),
+        _HASH.pack(board.hash),
+        bytes(board.heights),
+        playfield,
+    ))
+
+
+def decode(data: Union[bytes, bytearray, memoryview], track_features: bool = False,
+           verify: bool = False) -> Tuple[Board, Stats]:
+    """
+    Rebuilds a board and stats from a frame produced by encode
+    :param data: the frame, read in place through a memoryview
+    :param track_features: rebuild the board's features now and keep them up to date, see Board;
+        otherwise they are computed on access and decoding skips scanning the playfield
+    :param verify: recompute the stored hash and heights from the playfield and reject the frame if they differ
+    :raises CodecError: if the frame is truncated or holds values no board can have
+    """
+    view = memoryview(data)
+    if len(view) < _HEADER.size + _PIECES.size + _GENERATOR.size:
+        raise CodecError('Truncated board frame')
+    magic, version, engine, size_x, size_y = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise CodecError(f'Not a version {VERSION} board frame')
+    if engine >= len(_ENGINE_CLASSES):
+        raise CodecError(f'Unknown engine id {engine}')
+    if not size_x or not size_y:
+        raise CodecError(f'Empty {size_x}x{size_y} board')
+    offset = _HEADER.size
+
+    kind, rotation, x, y, next_kind, next_rotation, next_x, next_y, topped_out = _PIECES.unpack_from(view, offset)
+    if max(kind, next_kind) >= _PIECE_KINDS or max(rotation, next_rotation) >= 4:
+        raise CodecError('Invalid piece')
+    offset += _PIECES.size
+
+    generator_id, rng_state, extra, queue_length = _GENERATOR.unpack_from(view, offset)
+    if generator_id >= len(_GENERATOR_CLASSES):
+        raise CodecError(f'Unknown generator id {generator_id}')
+    offset += _GENERATOR.size
+    cells = size_x * size_y
+    if len(view) < offset + queue_length + _STATS.size + _HASH.size + size_x + (cells + 1) // 2:
+        raise CodecError('Truncated board frame')
+    queue_bytes = view[offset:offset + queue_length].tobytes()
+    if queue_bytes.translate(None, _VALID_QUEUE_BYTES):
+        raise CodecError('Invalid queued piece')
+    queue = tuple(map(_QUEUE_ENTRIES.__getitem__, queue_bytes))
+    offset += queue_length
+    checkpoint = (rng_state, None if extra == 255 else extra, queue)
+
+    score, lines, level = _STATS.unpack_from(view, offset)
+    offset += _STATS.size
+
+    board_hash, = _HASH.unpack_from(view, offset)
+    offset += _HASH.size
+    heights = list(view[offset:offset + size_x])
+    if max(heights) > size_y:
+        raise CodecError('Column height exceeds the board')
+    offset += size_x
+
+    packed = view[offset:offset + (cells + 1) // 2].tobytes()
+    colors = bytearray(len(packed) * 2)
+    colors[0::2] = packed.translate(_HIGH_NIBBLE)
+    colors[1::2] = packed.translate(_LOW_NIBBLE)
+
+    generator = _GENERATOR_CLASSES[generator_id](0)
+    generator.restore(checkpoint)
+    piece = Piece.at(kind, rotation, x, y)
+    next_piece = Piece.at(next_kind, next_rotation, next_x, next_y)
+    board_class = _ENGINE_CLASSES[engine]
+    # when verifying, the board recomputes both from its tiles
+    board = board_class._from_state(size_x, size_y, colors[:cells], piece, next_piece, topped_out, generator,
+                                    None if verify else heights, None if verify else board_hash, track_features)
+    if verify and (board.heights != heights or board.hash != board_hash):
+        raise CodecError('Stored hash or heights do not match the playfield')
+
+    stats = Stats()
+    stats.score, stats.lines, stats.level = score, lines, level
+    return board, stats
+
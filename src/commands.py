@@ -0,0 +1,84 @@
+from __future__ import annotations
+from typing import *
+
+import asyncio
+import time
+from collections import deque
+
+import src.settings as settings
+
+
+class QueueStats(NamedTuple):
+    applied: int
+    dropped: int
+    mean_latency: float  # s between push and apply
+    max_latency: float
+
+
+class CommandQueue:
+    """
+    Bounded queue of actions that any thread may push, applied one at a time by a single
+    consumer running on an asyncio event loop. Pushing is a deque append, no lock is taken;
+    when the queue is full the new action is dropped and counted. Without a lock, the bound
+    and the drop count are approximate: producers pushing at the same time (pynput and
+    gravity) may overshoot the capacity by one action each, and may lose a drop count.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        """
+        Inits class CommandQueue
+        :param capacity: number of pending actions above which new ones are dropped,
+            settings.COMMAND_QUEUE_SIZE if None
+        """
+        self._capacity = settings.COMMAND_QUEUE_SIZE if capacity is None else capacity
+        self._commands = deque()  # of (action, push time)
+        self._loop = None
+        self._ready = None
+        self._applied = 0
+        self._dropped = 0
+        self._total_latency = 0.
+        self._max_latency = 0.
+
+    def push(self, action: str) -> bool:
+        """
+        Queues an action, from any thread
+        :return: False if the queue was full and the action dropped
+        """
+        if len(self._commands) >= self._capacity:
+            self._dropped += 1
+            return False
+        self._commands.append((action, time.perf_counter()))
+        loop = self._loop  # read once, consume() resets it from the loop's thread
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                pass  # the loop closed meanwhile, nothing consumes the action anymore
+        return True
+
+    async def consume(self, apply: Callable[[str], Any]):
+        """
+        Applies queued actions in order until cancelled; the only place actions get applied
+        :param apply: called with every action
+        """
+        self._ready = asyncio.Event()
+        self._loop = asyncio.get_running_loop()  # after _ready, push() relies on it once it sees the loop
+        commands = self._commands
+        try:
+            while True:
+                if not commands:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                action, pushed = commands.popleft()
+                apply(action)
+                latency = time.perf_counter() - pushed
+                self._applied += 1
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+        finally:
+            self._loop = None
+
+    def stats(self) -> QueueStats:
+        mean = self._total_latency / self._applied if self._applied else 0.
+        return QueueStats(self._applied, self._dropped, mean, self._max_latency)
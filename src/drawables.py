@@ -6,6 +6,8 @@ from abc import ABC, abstractmethod
 import curses
 
 from src.board import Board
+from src.observers import Observable, Observer
+from src.palette import color_pair, tile_attributes
 
 
 class Drawable(ABC):
@@ -18,6 +20,18 @@ class Drawable(ABC):
     def draw(self) -> None:
         pass
 
+    def invalidate(self) -> None:
+        """
+        Forgets what was drawn before, so the next draw repaints everything
+        """
+        pass
+
+    def noutrefresh(self) -> None:
+        """
+        Marks what the drawable changed for the next doupdate() of the screen
+        """
+        pass
+
 
 class NText(Drawable):
     def __init__(self, screen, text: str, x: int, y: int, color: int, *, alignment='left', width=None, blinking=False):
@@ -28,6 +42,7 @@ class NText(Drawable):
         self.blinking = blinking
 
         self.lines = self.align_lines(text)
+        self._drawn = False
 
     def align_lines(self, text: str) -> List[str]:
         width = self.width or max([len(line) for line in text.split('\n')])
@@ -36,23 +51,42 @@ class NText(Drawable):
             else str.ljust
         return [align(line, width) for line in text.split('\n')]
 
+    def invalidate(self) -> None:
+        self._drawn = False
+
     def draw(self) -> None:
+        if self._drawn:
+            return
         for idx, line in enumerate(self.lines):
             self._screen.addstr(self.y + idx,
                                 self.x,
                                 line,
                                 self.color | (curses.A_BLINK if self.blinking else 1))
+        self._drawn = True
 
 
 class DynamicText(NText):
-    def __init__(self, screen, text_source: callable[[Any], str], x: int, y: int, color: int, *, alignment='left', width=None,
-                 blinking=False):
-        super(DynamicText, self).__init__(screen, text_source(), x, y, color, alignment=alignment, width=width, blinking=blinking)
+    """
+    Text taken from a source on every frame. Lines are only laid out and drawn again when the
+    source's value changes, so the source should return something cheap to compare, which the
+    formatter then turns into text.
+    """
+
+    def __init__(self, screen, text_source: callable[[], Any], x: int, y: int, color: int, *,
+                 formatter: callable[[Any], str] = str, alignment='left', width=None, blinking=False):
+        value = text_source()
+        super(DynamicText, self).__init__(screen, formatter(value), x, y, color, alignment=alignment, width=width,
+                                          blinking=blinking)
         self._text_source = text_source
+        self._formatter = formatter
+        self._value = value
 
     def draw(self) -> None:
-        text = self._text_source()
-        self.lines = self.align_lines(text)
+        value = self._text_source()
+        if value != self._value:
+            self._value = value
+            self.lines = self.align_lines(self._formatter(value))
+            self._drawn = False
         super(DynamicText, self).draw()
 
 
@@ -65,6 +99,14 @@ class Rect(Drawable, ABC):
         self._subwin = self._screen.subwin(size_y, size_x, y, x)
         self._subwin.idcok(False)
         self._subwin.idlok(False)
+        self._needs_layout = True
+
+    def invalidate(self) -> None:
+        self._needs_layout = True
+
+    def noutrefresh(self) -> None:
+        # the subwindow shares the parent's cells but tracks its own changes
+        self._subwin.noutrefresh()
 
 
 class NBox(Rect):
@@ -73,37 +115,115 @@ class NBox(Rect):
         self._subwin.bkgd(' ', curses.COLOR_WHITE | curses.A_BOLD)
 
     def draw(self) -> None:
+        if not self._needs_layout:
+            return
         self._subwin.clear()
+        self._needs_layout = False
 
 
 class NFrame(Rect):
     def __init__(self, screen, x: int, y: int, size_x: int, size_y: int, title=''):
         super(NFrame, self).__init__(screen, x, y, size_x, size_y)
 
-        self._title = NText(screen, title, x + (size_x - len(title)) // 2, y, curses.color_pair(1))
+        self._title = NText(screen, title, x + (size_x - len(title)) // 2, y, color_pair(1))
+
+    def invalidate(self) -> None:
+        super(NFrame, self).invalidate()
+        self._title.invalidate()
 
     def draw(self) -> None:
+        if not self._needs_layout:
+            return
         self._subwin.border(0)
+        self._title.invalidate()  # the border runs over the title
         self._title.draw()
-        super(NFrame, self).draw()
+        self._needs_layout = False
+
 
+class BoardDrawable(Drawable, Observer):
+    """
+    Draws the board, emitting curses calls only for rows that changed since the last draw.
+    Each changed row is written as one addstr per run of same-colored tiles. It observes
+    the board, so frames where nothing happened are skipped altogether.
+    """
 
-class BoardDrawable(Drawable):
-    def __init__(self, screen, x, y, board: Board):
+    def __init__(self, screen, x, y, board: Board, *, tile_width: int = 2):
+        """
+        Inits class BoardDrawable
+        :param tile_width: columns per tile, 2 looks square, 1 is compact
+        """
         super(BoardDrawable, self).__init__(screen, x, y)
         self._board = board
+        self._attrs = tile_attributes()
+        self._tile_width = tile_width
+        self._filled_tile = ' ' * tile_width
+        self._empty_tile = ' ' * (tile_width - 1) + '.'
+        self._shadow = None  # rows of what is currently on screen
+        self._dirty = True
+        board.attach_observer(self)
+
+    @property
+    def board(self) -> Board:
+        return self._board
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def set_board(self, board: Board) -> None:
+        """
+        Shows another board in the same place
+        """
+        self._board.detach_observer(self)
+        self._board = board
+        board.attach_observer(self)
+        self.invalidate()
+
+    def update(self, observable: Observable, **kwargs) -> None:
+        self._dirty = True
+
+    def invalidate(self) -> None:
+        self._shadow = None
+        self._dirty = True
 
     def draw(self) -> None:
-        for col_i in range(self._board.size_x):
-            for row_i in range(self._board.size_y):
-                field = self._board.contents[col_i][row_i]
-                if field:
-                    self._screen.addstr(self.y + row_i, self.x + 2 * col_i, '  ',
-                                        curses.color_pair(field) | curses.A_BOLD)
-                else:
-                    self._screen.addch(self.y + row_i, self.x + 2 * col_i + 1, '.',
-                                       curses.color_pair(10) | curses.A_BOLD)
-
-        for tile_x, tile_y in self._board.newblock_tiles:
-            self._screen.addstr(self.y + tile_y, self.x + 2 * tile_x, '  ',
-                                curses.color_pair(self._board.newblock_color) | curses.A_BOLD)
+        if not self._dirty:
+            return
+        self._dirty = False
+
+        rows = self._board.row_fields()
+        piece = self._board.piece
+        for tile_y in {tile_y for _, tile_y in piece.tiles}:
+            row = list(rows[tile_y])
+            for tile_x, y in piece.tiles:
+                if y == tile_y:
+                    row[tile_x] = piece.color
+            rows[tile_y] = tuple(row)
+
+        shadow = self._shadow
+        if shadow is None:
+            shadow = self._shadow = [(0,) * len(rows[0])] * len(rows)  # 0 never matches a tile
+
+        for row_i, row in enumerate(rows):
+            old = shadow[row_i]
+            if row == old:
+                continue
+            shadow[row_i] = row
+            self._draw_runs(row_i, row, old)
+
+    def _draw_runs(self, row_i: int, row: Tuple[Optional[int], ...], old: Tuple[Optional[int], ...]):
+        size = len(row)
+        start = 0
+        while start < size:
+            field = row[start]
+            if field == old[start]:
+                start += 1
+                continue
+            # unchanged tiles of the same color are rewritten too, it's cheaper than another call
+            end = start + 1
+            while end < size and row[end] == field:
+                end += 1
+            self._screen.addstr(self.y + row_i, self.x + self._tile_width * start,
+                                (self._empty_tile if field is None else self._filled_tile) * (end - start),
+                                self._attrs[field])
+            start = end
@@ -0,0 +1,16 @@
+from __future__ import annotations
+from typing import *
+
+from src.board import Board
+from src.bitboard import BitBoard
+from src.randomizer import PieceGenerator
+
+ENGINES = {'list': Board,
+           'bitboard': BitBoard}
+
+
+def create_board(size_x: int, size_y: int, engine: str = 'list', generator: Optional[PieceGenerator] = None,
+                 track_features: bool = True) -> Board:
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown board engine '{engine}', expected one of: {', '.join(ENGINES)}")
+    return ENGINES[engine](size_x, size_y, generator, track_features)
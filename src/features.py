@@ -0,0 +1,38 @@
+from __future__ import annotations
+from typing import *
+
+
+class BoardFeatures(NamedTuple):
+    aggregate_height: int
+    holes: int  # empty tiles below the top of their column
+    row_transitions: int  # filled/empty changes along every row, walls count as filled
+    column_transitions: int  # filled/empty changes down every column, the floor counts as filled
+    wells: int  # sum of how far each column lies below its lower neighbour
+    bumpiness: int  # sum of height differences between adjacent columns
+
+
+def column_well(heights: List[int], x: int) -> int:
+    # edge columns are compared with their only neighbour
+    left = heights[x - 1] if x > 0 else heights[x + 1]
+    right = heights[x + 1] if x < len(heights) - 1 else heights[x - 1]
+    return max(0, min(left, right) - heights[x])
+
+
+def compute_features(contents: List[List[Optional[int]]]) -> BoardFeatures:
+    """
+    Computes the features from scratch by scanning every tile
+    :param contents: column-major grid like Board.contents
+    """
+    size_x, size_y = len(contents), len(contents[0])
+    filled = [[field is not None for field in col] + [True] for col in contents]  # with the floor
+    heights = [next((size_y - y for y in range(size_y) if col[y]), 0) for col in filled]
+
+    holes = sum(not col[y] for col, height in zip(filled, heights) for y in range(size_y - height, size_y))
+    column_transitions = sum(col[y] != col[y + 1] for col in filled for y in range(size_y))
+    row_transitions = 0
+    for y in range(size_y):
+        row = [True] + [col[y] for col in filled] + [True]
+        row_transitions += sum(row[x] != row[x + 1] for x in range(size_x + 1))
+    wells = sum(column_well(heights, x) for x in range(size_x))
+    bumpiness = sum(abs(heights[x] - heights[x + 1]) for x in range(size_x - 1))
+    return BoardFeatures(sum(heights), holes, row_transitions, column_transitions, wells, bumpiness)
@@ -2,103 +2,120 @@ from __future__ import annotations
 
 from typing import *
 
-import time
+import asyncio
 import curses
-import threading
 
 from pynput.keyboard import KeyCode, Listener, Key
 
 import src.settings as settings
-from src.board import Board
+from src.ansi import AnsiScreen
+from src.commands import CommandQueue
+from src.engines import create_board
+from src.randomizer import create_generator
+from src.palette import init_curses
+from src.renderer import Renderer, CursesRenderer, AnsiRenderer
 from src.stats import Stats
 from src.windows import GameActiveWindow
 
+_KEY_ACTIONS = {Key.left: 'left',
+                Key.right: 'right',
+                Key.up: 'rotate',
+                Key.down: 'drop'}
 
-def run_game(screen: curses.window):
-    game = Game(screen)
-
-    curses.use_default_colors()
-    curses.curs_set(0)
-    for idx, rgb in settings.CUSTOM_COLORS.items():
-        curses.init_color(idx, *rgb)
-    for idx, rgb in settings.COLOR_PAIRS.items():
-        curses.init_pair(idx, *rgb)
-
-    threads = [
-        threading.Thread(target=_game_thread, args=(game,)),
-        threading.Thread(target=_ui_thread, args=(game,), daemon=True),
-        threading.Thread(target=_timer_thread, args=(game,), daemon=True)
-    ]
 
-    for thread in threads:
-        thread.start()
-
-    threads[0].join()
+def run_game(screen: curses.window):
+    game = Game(screen, CursesRenderer)
+    init_curses()
+    asyncio.run(game.run())
     curses.flushinp()
+    return game
 
 
-def _game_thread(game: Game):
-    with Listener(
-            on_press=game.handle_key_press,
-            on_release=game.handle_key_release
-    ) as listener:
-        listener.join()
-
-
-def _ui_thread(game: Game):
-    refresh_delay = 1. / settings.REFRESH_RATE
-    while True:
-        time.sleep(refresh_delay)
-        game.redraw_screen()
-
-
-def _timer_thread(game: Game):
-    game.handle_timer()
-    threading.Timer(0.5, _timer_thread, (game,)).start()
+def run_ansi_game():
+    """
+    Runs the game on the ANSI backend, without curses
+    """
+    with AnsiScreen() as screen:
+        game = Game(screen, AnsiRenderer)
+        asyncio.run(game.run())
+    return game
 
 
 class Game:
-    def __init__(self, screen):
+    """
+    Gravity ticks and keys become actions on a CommandQueue. A single consumer task applies
+    them on the asyncio event loop, which also runs the renderer, so every frame shows the
+    board between two whole actions. pynput still listens in its own thread, but only pushes
+    to the queue.
+    """
+
+    def __init__(self, screen, renderer_class: Type[Renderer] = CursesRenderer):
         self._screen = screen
-        self._board = Board(*settings.BOARD_SIZE)
+        self._board = create_board(*settings.BOARD_SIZE, engine=settings.BOARD_ENGINE,
+                                   generator=create_generator(settings.PIECE_GENERATOR))
         self._stats = Stats()
         self._window = GameActiveWindow(screen, self._board, self._stats)
+        self.renderer = renderer_class(screen, self._window)
+        self.renderer.watch(self._board)
+        self.renderer.watch(self._stats)
+        self.commands = CommandQueue()
 
         self.ended = False
+        self._loop = None
+        self._quit = None
+
+    async def run(self):
+        """
+        Plays until Esc is released
+        """
+        loop = self._loop = asyncio.get_running_loop()
+        self._quit = asyncio.Event()
+        listener = Listener(
+            on_press=self.handle_key_press,
+            on_release=self.handle_key_release
+        )
+        tasks = [loop.create_task(self.commands.consume(self.apply_action)),
+                 loop.create_task(self._gravity()),
+                 loop.create_task(self.renderer.run())]
+        listener.start()
+        try:
+            await self._quit.wait()
+        finally:
+            listener.stop()
+            self.renderer.stop()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _gravity(self):
+        while True:
+            await asyncio.sleep(settings.GRAVITY_PERIOD)
+            self.commands.push('tick')
 
     def handle_key_press(self, key: KeyCode):
-        with threading.Lock():
-            if key == Key.left:
-                self._board.move_block('w')
-            elif key == Key.right:
-                self._board.move_block('e')
-            elif key == Key.up:
-                self._board.rotate_block('r')
-            elif key == Key.down:
-                drop_pts = 0
-                while self._board.move_block('s'):
-                    drop_pts += 2
-                    pass
-                lines = self._board.place_block()
-                Stats.score += Stats.level * (0, 40, 100, 300, 1200)[lines] + drop_pts
-                Stats.lines += lines
-                if Stats.lines >= 5 * (Stats.level + 1) * Stats.level:
-                    Stats.level += 1
-
-    def handle_timer(self):
-        with threading.Lock():
-            if self._board.move_block('s'):
-                return
-
-            Stats.score += Stats.level * (40, 100, 300, 1200)[self._board.place_block() - 1]
+        action = _KEY_ACTIONS.get(key)
+        if action:
+            self.commands.push(action)
 
     def handle_key_release(self, key: Key):
-        with threading.Lock():
-            if key == Key.esc:
-                self.ended = True
-                return False
-
-    def redraw_screen(self):
-        self._screen.erase()
-        self._window.draw()
-        self._screen.refresh()
+        if key == Key.esc:
+            # not queued, so a full queue can't keep the game from ending
+            self._loop.call_soon_threadsafe(self._end)
+
+    def _end(self):
+        self.ended = True
+        self._quit.set()
+
+    def apply_action(self, action: str):
+        if action == 'left':
+            self._board.move_block('w')
+        elif action == 'right':
+            self._board.move_block('e')
+        elif action == 'rotate':
+            self._board.rotate_block('r')
+        elif action == 'drop':
+            drop_pts = 2 * self._board.hard_drop()
+            self._stats.add_placement(self._board.place_block(), drop_pts)
+        elif action == 'tick':
+            if not self._board.move_block('s'):
+                self._stats.add_placement(self._board.place_block())
@@ -0,0 +1,136 @@
+from __future__ import annotations
+from typing import *
+
+import itertools
+import random
+import time
+
+import src.settings as settings
+from src.engines import create_board
+from src.randomizer import PieceGenerator, create_generator
+from src.stats import Stats
+
+ACTIONS = ('left', 'right', 'rotate', 'drop', 'tick')
+PLACING_ACTIONS = ('drop', 'tick')  # the ones that eventually place the falling block
+
+
+class SimulationResult(NamedTuple):
+    pieces: int
+    lines: int
+    games: int
+    elapsed: float
+
+    @property
+    def pieces_per_sec(self) -> float:
+        return self.pieces / self.elapsed if self.elapsed else float('inf')
+
+    @property
+    def lines_per_sec(self) -> float:
+        return self.lines / self.elapsed if self.elapsed else float('inf')
+
+
+class HeadlessGame:
+    """
+    Game equivalent that runs without curses or pynput, driven by action names from ACTIONS.
+    Boards don't keep their features up to date unless track_features is set, nothing here reads them.
+    """
+
+    def __init__(self, size_x: Optional[int] = None, size_y: Optional[int] = None, engine: Optional[str] = None,
+                 generator: Optional[PieceGenerator] = None, track_features: bool = False):
+        """
+        Inits class HeadlessGame
+        :param size_x: board width, from settings.BOARD_SIZE if None
+        :param size_y: board height, from settings.BOARD_SIZE if None
+        :param engine: board engine, settings.BOARD_ENGINE if None
+        :param generator: piece generator shared by all games, settings.PIECE_GENERATOR if None
+        :param track_features: keep the boards' features up to date
+        """
+        size_x = settings.BOARD_SIZE[0] if size_x is None else size_x
+        size_y = settings.BOARD_SIZE[1] if size_y is None else size_y
+        engine = settings.BOARD_ENGINE if engine is None else engine
+        self._size = (size_x, size_y)
+        self._engine = engine
+        self._track_features = track_features
+        # shared by consecutive games, so a seeded generator makes the whole run reproducible
+        self._generator = generator or create_generator(settings.PIECE_GENERATOR)
+        self.board = create_board(size_x, size_y, engine=engine, generator=self._generator,
+                                  track_features=track_features)
+        self.stats = Stats()
+        self.pieces = 0
+
+    def reset(self):
+        self.board = create_board(*self._size, engine=self._engine, generator=self._generator,
+                                  track_features=self._track_features)
+        self.stats = Stats()
+
+    def handle_action(self, action: str):
+        if action == 'left':
+            self.board.move_block('w')
+        elif action == 'right':
+            self.board.move_block('e')
+        elif action == 'rotate':
+            self.board.rotate_block('r')
+        elif action == 'drop':
+            self._place(2 * self.board.hard_drop())
+        elif action == 'tick':
+            if not self.board.move_block('s'):
+                self._place(0)
+        else:
+            raise ValueError(f"Unknown action '{action}', expected one of: {', '.join(ACTIONS)}")
+
+    def _place(self, drop_pts: int):
+        self.stats.add_placement(self.board.place_block(), drop_pts)
+        self.pieces += 1
+
+    @property
+    def ended(self) -> bool:
+        return self.board.topped_out
+
+
+def scripted_source(script: str) -> Iterator[str]:
+    """
+    Repeats a whitespace separated list of actions forever
+    :param script: e.g. 'left left rotate drop'
+    """
+    actions = script.split()
+    for action in actions:
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action '{action}', expected one of: {', '.join(ACTIONS)}")
+    if not set(actions) & set(PLACING_ACTIONS):
+        # simulate() would never reach its piece count
+        raise ValueError(f"Script never places a piece, it needs at least one of: {', '.join(PLACING_ACTIONS)}")
+    return itertools.cycle(actions)
+
+
+def random_bot_source(seed: Optional[int] = None) -> Iterator[str]:
+    """
+    Rotates and shifts every piece randomly, then drops it
+    :param seed: seed of the bot's own PRNG
+    """
+    rng = random.Random(seed)
+    while True:
+        yield from ['rotate'] * rng.randint(0, 3)
+        yield from [rng.choice(('left', 'right'))] * rng.randint(0, 5)
+        yield 'drop'
+
+
+def simulate(game: HeadlessGame, source: Iterator[str], pieces: int) -> SimulationResult:
+    """
+    Feeds actions from the source into the game as fast as possible, restarting it on top out
+    :param game: game to drive
+    :param source: iterator of action names
+    :param pieces: number of pieces to place before stopping
+    """
+    lines = 0
+    games = 1
+    start = time.perf_counter()
+    for action in source:
+        if game.pieces >= pieces:
+            break
+        game.handle_action(action)
+        if game.ended:
+            lines += game.stats.lines
+            games += 1
+            game.reset()
+    lines += game.stats.lines
+    return SimulationResult(game.pieces, lines, games, time.perf_counter() - start)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+from typing import *
+
+from collections import deque
+
+from src.board import Board
+from src.pieces import Piece
+from src.transposition import LRUTranspositionTable
+
+# inputs making up a path, as the game plays them: w/e shift (Key.left/right), r rotate clockwise (Key.up),
+# s wait for gravity to pull the block one row down; every path ends with d, the hard drop locking the block (Key.down)
+INPUTS = 'wers'
+LOCK = 'd'
+
+
+class Placement(NamedTuple):
+    kind: int
+    rotation: int
+    x: int
+    y: int
+    path: str
+
+
+class MoveGenerator:
+    """
+    Lists every final position the falling block can reach, including tucks and spins,
+    together with the shortest input path leading there. Results are memoized per
+    board state and starting position in a bounded LRU cache.
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        self.cache = LRUTranspositionTable(cache_size)
+
+    def placements(self, board: Board) -> Tuple[Placement, ...]:
+        key = (board.state_key(), board.piece.key)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._search(board, board.piece)
+        self.cache.put(key, result)
+        return result
+
+    @staticmethod
+    def _search(board: Board, start: Piece) -> Tuple[Placement, ...]:
+        kind = start.kind
+        fits = board._fits
+        if not fits(kind, start.rotation, start.x, start.y):
+            return ()
+
+        # breadth first, so the first path reaching a state is one of the shortest
+        parents = {start: None}
+        queue = deque([start])
+        landings = {}
+        while queue:
+            piece = queue.popleft()
+            r, x, y = piece.rotation, piece.x, piece.y
+            landing = piece.moved(0, board._drop_distance(kind, r, x, y))
+            if landing not in landings:
+                landings[landing] = piece
+
+            for move in INPUTS:
+                if move == 'w' or move == 'e':
+                    offset = -1 if move == 'w' else 1
+                    neighbour = piece.moved(offset, 0) if fits(kind, r, x + offset, y) else None
+                elif move == 's':
+                    neighbour = piece.moved(0, 1) if fits(kind, r, x, y + 1) else None
+                else:
+                    neighbour = board._kick(piece, move)
+                if neighbour is not None and neighbour not in parents:
+                    parents[neighbour] = (piece, move)
+                    queue.append(neighbour)
+
+        result = []
+        for landing, node in landings.items():
+            path = [LOCK]
+            while parents[node] is not None:
+                node, move = parents[node]
+                path.append(move)
+            result.append(Placement(kind, landing.rotation, landing.x, landing.y, ''.join(reversed(path))))
+        return tuple(result)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+from typing import *
+
+import curses
+import functools
+
+import src.settings as settings
+
+EMPTY_TILE_PAIR = 10
+
+
+def color_pair(idx: int) -> int:
+    """
+    curses.color_pair that also works before initscr(), e.g. when drawing to a virtual screen
+    """
+    try:
+        return curses.color_pair(idx)
+    except curses.error:
+        return idx << 8  # what ncurses' COLOR_PAIR macro computes
+
+
+def tile_attributes() -> Dict[Optional[int], int]:
+    """
+    Attribute of every board tile color, None being an empty tile. Computed once per drawable
+    instead of once per tile and frame.
+    """
+    attrs = {idx: color_pair(idx) | curses.A_BOLD for idx in settings.COLOR_PAIRS}
+    attrs[None] = attrs[EMPTY_TILE_PAIR]
+    return attrs
+
+
+def init_curses() -> None:
+    """
+    Sets up the cursor, custom colors and color pairs from settings; needs initscr()
+    """
+    curses.use_default_colors()
+    curses.curs_set(0)
+    for idx, rgb in settings.CUSTOM_COLORS.items():
+        curses.init_color(idx, *rgb)
+    for idx, rgb in settings.COLOR_PAIRS.items():
+        curses.init_pair(idx, *rgb)
+
+
+@functools.lru_cache(maxsize=None)
+def ansi_sgr(attr: int) -> str:
+    """
+    ANSI escape sequence selecting the same rendition as a curses attribute
+    """
+    codes = ['0']
+    if attr & curses.A_BOLD:
+        codes.append('1')
+    if attr & curses.A_BLINK:
+        codes.append('5')
+    if attr & curses.A_REVERSE:
+        codes.append('7')
+    fg, bg = settings.COLOR_PAIRS.get((attr & curses.A_COLOR) >> 8, (-1, -1))
+    codes += _ansi_color(fg, 30) + _ansi_color(bg, 40)
+    return f"\x1b[{';'.join(codes)}m"
+
+
+def _ansi_color(color: int, base: int) -> List[str]:
+    if color < 0:
+        return []  # terminal default, already selected by the reset
+    if color < 8:
+        return [str(base + color)]
+    if color in settings.CUSTOM_COLORS:
+        r, g, b = (value * 255 // 1000 for value in settings.CUSTOM_COLORS[color])
+        return [f'{base + 8};2;{r};{g};{b}']
+    return [f'{base + 8};5;{color}']
@@ -0,0 +1,138 @@
+from __future__ import annotations
+from typing import *
+
+BLOCKS = (
+    [(pos, 0) for pos in range(4)],  # cyan
+    [(pos, 1) for pos in range(3)] + [(0, 0)],  # blue
+    [(pos, 1) for pos in range(3)] + [(2, 0)],  # orange
+    [(0, 0), (0, 1), (1, 0), (1, 1)],  # yellow
+    [(1, 0), (2, 0), (0, 1), (1, 1)],  # green
+    [(pos, 1) for pos in range(3)] + [(1, 0)],  # purple
+    [(0, 0), (1, 0), (1, 1), (2, 1)]  # red
+)
+# c, b, o, y, g, p, r
+COLORS = list(range(11, 18))
+
+I, J, L, O, S, T, Z = range(7)
+
+# side of the square each piece rotates in; the I piece spawns in the second row of its box
+_BOX_SIZES = (4, 3, 3, 2, 3, 3, 3)
+_BOX_ROW = (1, 0, 0, 0, 0, 0, 0)
+
+# SRS wall kicks in board coordinates (y grows downwards), keyed by (from, to) rotation
+_JLSTZ_KICKS = {
+    (0, 1): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (1, 0): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    (1, 2): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+    (2, 1): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    (2, 3): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    (3, 2): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (3, 0): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+    (0, 3): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+}
+_I_KICKS = {
+    (0, 1): ((0, 0), (-2, 0), (1, 0), (-2, 1), (1, -2)),
+    (1, 0): ((0, 0), (2, 0), (-1, 0), (2, -1), (-1, 2)),
+    (1, 2): ((0, 0), (-1, 0), (2, 0), (-1, -2), (2, 1)),
+    (2, 1): ((0, 0), (1, 0), (-2, 0), (1, 2), (-2, -1)),
+    (2, 3): ((0, 0), (2, 0), (-1, 0), (2, -1), (-1, 2)),
+    (3, 2): ((0, 0), (-2, 0), (1, 0), (-2, 1), (1, -2)),
+    (3, 0): ((0, 0), (1, 0), (-2, 0), (1, 2), (-2, -1)),
+    (0, 3): ((0, 0), (-1, 0), (2, 0), (-1, -2), (2, 1)),
+}
+_O_KICKS = {(r, (r + d) % 4): ((0, 0),) for r in range(4) for d in (1, -1)}
+
+
+def _build_shapes(kind: int) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    size = _BOX_SIZES[kind]
+    shape = [(x, y + _BOX_ROW[kind]) for x, y in BLOCKS[kind]]
+    rotations = []
+    for _ in range(4):
+        rotations.append(tuple(sorted(shape)))
+        shape = [(size - 1 - y, x) for x, y in shape]  # clockwise
+    return tuple(rotations)
+
+
+def _build_kicks(kind: int) -> Tuple[Tuple[Tuple[Tuple[int, int], ...], ...], ...]:
+    table = _I_KICKS if kind == I else _O_KICKS if kind == O else _JLSTZ_KICKS
+    # KICKS[kind][rotation][0] rotates clockwise, [1] counter-clockwise
+    return tuple((table[(r, (r + 1) % 4)], table[(r, (r - 1) % 4)]) for r in range(4))
+
+
+def _bounds(shape) -> Tuple[int, int, int, int]:
+    return (min(x for x, _ in shape), max(x for x, _ in shape),
+            min(y for _, y in shape), max(y for _, y in shape))
+
+
+def _row_masks(shape) -> Tuple[Tuple[int, int], ...]:
+    # bit 0 is the leftmost column of the shape, shift left by x + BOUNDS[..][0] to place it
+    min_x = min(x for x, _ in shape)
+    masks = {}
+    for x, y in shape:
+        masks[y] = masks.get(y, 0) | 1 << x - min_x
+    return tuple(sorted(masks.items()))
+
+
+def _column_tops(shape) -> Tuple[Tuple[int, int], ...]:
+    # topmost tile of every column the shape covers, as (x, y)
+    tops = {}
+    for x, y in shape:
+        tops[x] = min(tops.get(x, y), y)
+    return tuple(sorted(tops.items()))
+
+
+# all lookups below are indexed [kind][rotation]
+SHAPES = tuple(_build_shapes(kind) for kind in range(len(BLOCKS)))
+KICKS = tuple(_build_kicks(kind) for kind in range(len(BLOCKS)))
+BOUNDS = tuple(tuple(_bounds(shape) for shape in rotations) for rotations in SHAPES)
+ROW_MASKS = tuple(tuple(_row_masks(shape) for shape in rotations) for rotations in SHAPES)
+COLUMN_TOPS = tuple(tuple(_column_tops(shape) for shape in rotations) for rotations in SHAPES)
+SPAWN_Y = tuple(-row for row in _BOX_ROW)
+
+
+class Piece:
+    """
+    Immutable block of a given kind, rotation and position. Instances are interned, so
+    moving a piece back and forth reuses the same objects and their precomputed tiles.
+    """
+    __slots__ = ('kind', 'rotation', 'x', 'y', 'key', 'tiles')
+    _interned = {}
+
+    def __init__(self, kind: int, rotation: int, x: int, y: int, key: int):
+        # use Piece.at, which interns the instances
+        set_ = object.__setattr__
+        set_(self, 'kind', kind)
+        set_(self, 'rotation', rotation)
+        set_(self, 'x', x)
+        set_(self, 'y', y)
+        set_(self, 'key', key)
+        set_(self, 'tiles', tuple((x + tile_x, y + tile_y) for tile_x, tile_y in SHAPES[kind][rotation]))
+
+    @classmethod
+    def at(cls, kind: int, rotation: int, x: int, y: int) -> Piece:
+        # kind: 3 bits, rotation: 2 bits, x and y: 8 bits each, offset so negative positions fit
+        key = kind | rotation << 3 | (x + 64) << 5 | (y + 64) << 13
+        piece = cls._interned.get(key)
+        if piece is None:
+            piece = cls._interned[key] = cls(kind, rotation, x, y, key)
+        return piece
+
+    @classmethod
+    def spawn(cls, kind: int, x: int) -> Piece:
+        return cls.at(kind, 0, x, SPAWN_Y[kind])
+
+    def moved(self, x_offset: int, y_offset: int) -> Piece:
+        return Piece.at(self.kind, self.rotation, self.x + x_offset, self.y + y_offset)
+
+    @property
+    def color(self) -> int:
+        return COLORS[self.kind]
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Piece is immutable')
+
+    def __reduce__(self):
+        return Piece.at, (self.kind, self.rotation, self.x, self.y)
+
+    def __repr__(self) -> str:
+        return f'Piece(kind={self.kind}, rotation={self.rotation}, x={self.x}, y={self.y})'
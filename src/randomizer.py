@@ -0,0 +1,166 @@
+from __future__ import annotations
+from typing import *
+
+from abc import ABC, abstractmethod
+from collections import deque
+import copy
+import os
+
+SPAWN_COLUMNS = range(3, 6)  # x offsets new blocks can appear at
+_PIECE_COUNT = 7
+_MASK = (1 << 64) - 1
+
+
+class SplitMix64:
+    """
+    Tiny PRNG whose whole state is one 64 bit int, so it's cheap to checkpoint and serialize
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), 'little')
+        self.state = seed & _MASK
+
+    def next(self) -> int:
+        self.state = (self.state + 0x9E3779B97F4A7C15) & _MASK
+        z = self.state
+        z = ((z ^ z >> 30) * 0xBF58476D1CE4E5B9) & _MASK
+        z = ((z ^ z >> 27) * 0x94D049BB133111EB) & _MASK
+        return z ^ z >> 31
+
+    def randbelow(self, n: int) -> int:
+        return self.next() % n
+
+
+class PieceGenerator(ABC):
+    """
+    Produces (kind, x offset) pairs for new blocks from its own PRNG. Pieces are generated
+    ahead in batches and served from a queue, which also provides the lookahead.
+    """
+
+    def __init__(self, seed: Optional[int] = None, batch_size: int = 56):
+        """
+        Inits class PieceGenerator
+        :param seed: seed of the generator's PRNG, random if None
+        :param batch_size: minimum number of pieces generated at once
+        """
+        self._rng = SplitMix64(seed)
+        self._batch_size = batch_size
+        self._queue = deque()
+
+    def next(self) -> Tuple[int, int]:
+        if not self._queue:
+            self._refill(self._batch_size)
+        return self._queue.popleft()
+
+    def peek(self, count: int) -> List[Tuple[int, int]]:
+        """
+        Upcoming pieces, without consuming them
+        :param count: number of pieces to look ahead
+        """
+        if len(self._queue) < count:
+            self._refill(max(self._batch_size, count - len(self._queue)))
+        return [self._queue[idx] for idx in range(count)]
+
+    def push_back(self, piece: Tuple[int, int]):
+        """
+        Returns a piece taken with next() to the front of the queue
+        """
+        self._queue.appendleft(piece)
+
+    def fork(self) -> PieceGenerator:
+        """
+        Independent copy that will deal exactly the same pieces
+        """
+        clone = copy.copy(self)
+        clone._rng = copy.copy(self._rng)
+        clone._queue = deque(self._queue)
+        return clone
+
+    def checkpoint(self) -> Tuple:
+        return self._rng.state, self._get_state(), tuple(self._queue)
+
+    def restore(self, checkpoint: Tuple):
+        rng_state, state, queue = checkpoint
+        self._rng.state = rng_state
+        self._set_state(state)
+        self._queue = deque(queue)
+
+    def _refill(self, count: int):
+        kinds = self._generate(count)
+        self._queue.extend((kind, SPAWN_COLUMNS[self._rng.randbelow(len(SPAWN_COLUMNS))]) for kind in kinds)
+
+    @abstractmethod
+    def _generate(self, count: int) -> List[int]:
+        """
+        Draws at least count new piece kinds
+        """
+        pass
+
+    def _get_state(self) -> Any:
+        return None
+
+    def _set_state(self, state: Any):
+        pass
+
+
+class UniformGenerator(PieceGenerator):
+    """
+    Every piece is drawn independently, like the original game did
+    """
+
+    def _generate(self, count: int) -> List[int]:
+        return [self._rng.randbelow(_PIECE_COUNT) for _ in range(count)]
+
+
+class SevenBagGenerator(PieceGenerator):
+    """
+    Deals shuffled bags of all seven pieces, so no piece is ever more than 12 pieces away
+    """
+
+    def _generate(self, count: int) -> List[int]:
+        kinds = []
+        while len(kinds) < count:
+            bag = list(range(_PIECE_COUNT))
+            for idx in range(_PIECE_COUNT - 1, 0, -1):
+                swap = self._rng.randbelow(idx + 1)
+                bag[idx], bag[swap] = bag[swap], bag[idx]
+            kinds += bag
+        return kinds
+
+
+class ClassicGenerator(PieceGenerator):
+    """
+    NES style: a roll repeating the previous piece (or hitting the extra eighth value) is rerolled once
+    """
+
+    def __init__(self, seed: Optional[int] = None, batch_size: int = 56):
+        super(ClassicGenerator, self).__init__(seed, batch_size)
+        self._last = None
+
+    def _generate(self, count: int) -> List[int]:
+        kinds = []
+        for _ in range(count):
+            kind = self._rng.randbelow(_PIECE_COUNT + 1)
+            if kind == _PIECE_COUNT or kind == self._last:
+                kind = self._rng.randbelow(_PIECE_COUNT)
+            kinds.append(kind)
+            self._last = kind
+        return kinds
+
+    def _get_state(self) -> Any:
+        return self._last
+
+    def _set_state(self, state: Any):
+        self._last = state
+
+
+GENERATORS = {'uniform': UniformGenerator,
+              'bag': SevenBagGenerator,
+              'classic': ClassicGenerator}
+
+
+def create_generator(name: str = 'uniform', seed: Optional[int] = None) -> PieceGenerator:
+    if name not in GENERATORS:
+        raise ValueError(f"Unknown piece generator '{name}', expected one of: {', '.join(GENERATORS)}")
+    return GENERATORS[name](seed)
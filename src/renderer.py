@@ -0,0 +1,194 @@
+from __future__ import annotations
+from typing import *
+
+from abc import ABC, abstractmethod
+import asyncio
+import curses
+import math
+import os
+import time
+from collections import deque
+
+import src.settings as settings
+from src.drawables import Drawable, DynamicText
+from src.observers import Observable, Observer
+from src.palette import color_pair
+
+_COST_SMOOTHING = 0.2  # weight of the newest frame in the average frame cost
+
+
+class Renderer(Observer, ABC):
+    """
+    Redraws a window whenever one of the watched observables changes. Changes arriving
+    within one frame interval are coalesced into a single redraw, and nothing is drawn
+    while the game is idle. The interval adapts to how long frames take to draw and
+    reach the terminal, so a slow terminal gets fewer frames instead of a backlog.
+    """
+
+    def __init__(self, screen, window: Drawable, refresh_rate: Optional[float] = None,
+                 min_refresh_rate: Optional[float] = None, show_stats: Optional[bool] = None):
+        """
+        Inits class Renderer
+        :param screen: screen the window draws to
+        :param window: root drawable of the frame
+        :param refresh_rate: maximum number of frames per second, settings.REFRESH_RATE if None
+        :param min_refresh_rate: the rate never drops below this, however slow the terminal;
+            settings.MIN_REFRESH_RATE if None
+        :param show_stats: show fps and dropped frames in the bottom line of the screen,
+            settings.SHOW_RENDER_STATS if None
+        """
+        refresh_rate = settings.REFRESH_RATE if refresh_rate is None else refresh_rate
+        min_refresh_rate = settings.MIN_REFRESH_RATE if min_refresh_rate is None else min_refresh_rate
+        show_stats = settings.SHOW_RENDER_STATS if show_stats is None else show_stats
+        self._screen = screen
+        self._window = window
+        self._min_interval = 1. / refresh_rate
+        self._max_interval = 1. / min_refresh_rate
+        self._interval = self._min_interval
+        self._frame_cost = None  # moving average of the seconds a frame takes
+        self._frame_times = deque()  # of the last second, for fps
+        self._last_frame = -math.inf
+        self._dirty_since = time.monotonic()
+        self._dirty = True  # the first frame
+        self._wakeup = None  # asyncio.Event of the loop run() is on
+        self._stopped = False
+        self.frames = 0
+        self.dropped_frames = 0
+        self._status = self._create_status() if show_stats else None
+
+    @property
+    def fps(self) -> int:
+        """
+        Frames drawn during the last second
+        """
+        horizon = time.monotonic() - 1.
+        while self._frame_times and self._frame_times[0] < horizon:
+            self._frame_times.popleft()
+        return len(self._frame_times)
+
+    @property
+    def target_fps(self) -> float:
+        """
+        Current limit of the frame rate, lower than refresh_rate when the terminal is being throttled
+        """
+        return 1. / self._interval
+
+    def watch(self, observable: Observable) -> None:
+        """
+        Redraws whenever the observable notifies
+        """
+        observable.attach_observer(self)
+
+    def update(self, observable: Observable, **kwargs) -> None:
+        self.request_redraw()
+
+    def request_redraw(self) -> None:
+        """
+        Schedules a frame; like update(), it must be called from the thread running the event loop
+        """
+        if not self._dirty:
+            self._dirty_since = time.monotonic()
+            self._dirty = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stop(self) -> None:
+        self._stopped = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def draw_frame(self) -> None:
+        started = time.perf_counter()
+        if self._check_resize():
+            # static chrome is only drawn on layout changes like this one
+            self._screen.erase()
+            self._window.invalidate()
+            if self._status is not None:
+                self._status = self._create_status()
+        # no erase() otherwise: drawables overwrite their own areas and the board only repaints changed tiles
+        self._window.draw()
+        if self._status is not None:
+            self._status.draw()
+        self._window.noutrefresh()
+        self._present()
+        self.frames += 1
+        self._frame_times.append(time.monotonic())
+        self._adapt(time.perf_counter() - started)
+
+    def _adapt(self, cost: float):
+        self._frame_cost = cost if self._frame_cost is None \
+            else (1 - _COST_SMOOTHING) * self._frame_cost + _COST_SMOOTHING * cost
+        interval = self._frame_cost / settings.RENDER_TIME_SHARE
+        self._interval = min(max(interval, self._min_interval), self._max_interval)
+
+    def _create_status(self) -> DynamicText:
+        lines, _ = self._screen.getmaxyx()
+        return DynamicText(self._screen, lambda: (self.fps, round(self.target_fps), self.dropped_frames), 0, lines - 1,
+                           color_pair(1), formatter=lambda values: '{} fps (max {}), {} dropped'.format(*values),
+                           width=40)
+
+    @abstractmethod
+    def _present(self) -> None:
+        """
+        Sends everything marked by noutrefresh() to the terminal
+        """
+        pass
+
+    @abstractmethod
+    def _check_resize(self) -> bool:
+        """
+        Adapts the screen if the terminal was resized, returns whether it was
+        """
+        pass
+
+    async def run(self) -> None:
+        """
+        Draws frames until stop() is called, waiting whenever nothing changed
+        """
+        self._wakeup = asyncio.Event()
+        while not self._stopped:
+            if not self._dirty:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # hold the frame until the interval is over, whatever changes meanwhile is drawn with it
+            delay = self._last_frame + self._interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                if self._stopped:
+                    return
+            self._dirty = False
+
+            # frames that drawing at the full refresh rate would have shown in the meantime
+            now = time.monotonic()
+            due = max(self._dirty_since, self._last_frame + self._min_interval)
+            self.dropped_frames += max(0, int((now - due) / self._min_interval))
+            self._last_frame = now
+            self.draw_frame()
+
+
+class CursesRenderer(Renderer):
+    def _present(self) -> None:
+        curses.doupdate()
+
+    def _check_resize(self) -> bool:
+        try:
+            size = os.get_terminal_size()
+        except OSError:
+            return False
+        if not curses.is_term_resized(size.lines, size.columns):
+            return False
+        curses.resizeterm(size.lines, size.columns)
+        return True
+
+
+class AnsiRenderer(Renderer):
+    """
+    Renders to a VirtualScreen, typically an AnsiScreen, bypassing curses altogether
+    """
+
+    def _present(self) -> None:
+        self._screen.doupdate()
+
+    def _check_resize(self) -> bool:
+        return self._screen.check_resize()
@@ -1,7 +1,17 @@
 import curses
 
-REFRESH_RATE = 60
+REFRESH_RATE = 60  # maximum frames per second
+MIN_REFRESH_RATE = 5  # frames per second on the slowest terminals
+RENDER_TIME_SHARE = 0.25  # fraction of time spent drawing before the frame rate is lowered
+SHOW_RENDER_STATS = False  # fps and dropped frames in the bottom line
 BOARD_SIZE = (10, 20)
+GRAVITY_PERIOD = 0.5  # s between the falling block's steps down
+COMMAND_QUEUE_SIZE = 64  # pending inputs and gravity ticks, more are dropped
+BOARD_ENGINE = 'list'  # 'list' or 'bitboard', see src.engines
+PIECE_GENERATOR = 'uniform'  # 'uniform', 'bag' or 'classic', see src.randomizer
+RENDERER = 'curses'  # 'curses' or 'ansi'
+SPECTATOR_FRAME_BUDGET = 0.004  # s spent repainting boards per spectator frame
+SPECTATOR_ACTION_RATE = 10  # bot actions per second in each spectated game
 WINDOW_SIZE = (78, 24)
 BLOCK_MOVEMENT_PERIODS = {0: 0.8,
                           1: 0.7166667,
@@ -0,0 +1,46 @@
+from __future__ import annotations
+from typing import *
+
+import asyncio
+
+import src.settings as settings
+from src.headless import HeadlessGame, random_bot_source
+from src.randomizer import create_generator
+from src.renderer import Renderer
+from src.windows import SpectatorWindow
+
+
+def run_spectator(screen, renderer_class: Type[Renderer], count: int, seed: Optional[int] = None):
+    """
+    Shows count bot-driven games side by side until interrupted with Ctrl+C
+    :param screen: curses screen or VirtualScreen to draw on
+    :param renderer_class: renderer matching the screen
+    :param count: number of games
+    :param seed: base seed, game n is seeded with seed + n
+    """
+    games = [HeadlessGame(generator=create_generator(settings.PIECE_GENERATOR, None if seed is None else seed + idx))
+             for idx in range(count)]
+    sources = [random_bot_source(None if seed is None else seed + idx) for idx in range(count)]
+    window = SpectatorWindow(screen, [game.board for game in games])
+    renderer = renderer_class(screen, window)
+    renderer.watch(window)
+    try:
+        asyncio.run(_spectate(renderer, window, games, sources))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _spectate(renderer: Renderer, window: SpectatorWindow, games: List[HeadlessGame], sources: List[Iterator[str]]):
+    render_task = asyncio.get_running_loop().create_task(renderer.run())
+    period = 1. / settings.SPECTATOR_ACTION_RATE
+    try:
+        while True:
+            for idx, (game, source) in enumerate(zip(games, sources)):
+                game.handle_action(next(source))
+                if game.ended:
+                    game.reset()
+                    window.set_board(idx, game.board)
+            await asyncio.sleep(period)
+    finally:
+        renderer.stop()
+        await render_task
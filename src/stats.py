@@ -1,14 +1,25 @@
 from __future__ import annotations
 from typing import *
 
+from src.observers import Observable
 
-class Stats:
-    score = 0
-    lines = 0
-    level = 1
 
-    @classmethod
-    def reset(cls):
-        cls.score = 0
-        cls.lines = 0
-        cls.level = 1
+class Stats(Observable):
+    def __init__(self):
+        super(Stats, self).__init__()
+        self.score = 0
+        self.lines = 0
+        self.level = 1
+
+    def reset(self):
+        self.score = 0
+        self.lines = 0
+        self.level = 1
+        self.notify()
+
+    def add_placement(self, lines: int, drop_pts: int = 0):
+        self.score += self.level * (0, 40, 100, 300, 1200)[lines] + drop_pts
+        self.lines += lines
+        if self.lines >= 5 * (self.level + 1) * self.level:
+            self.level += 1
+        self.notify()
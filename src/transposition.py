@@ -0,0 +1,115 @@
+from __future__ import annotations
+from typing import *
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class TranspositionTable(ABC):
+    """
+    Bounded cache of search results keyed by board hashes (see Board.state_key)
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Inits class TranspositionTable
+        :param capacity: maximum number of stored entries
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def get(self, key: Hashable, depth: int = 0) -> Any:
+        """
+        Looks up an entry
+        :param key: board hash
+        :param depth: minimum search depth the stored value must have been computed with
+        :return: the stored value or None
+        """
+        pass
+
+    @abstractmethod
+    def put(self, key: Hashable, value: Any, depth: int = 0) -> None:
+        """
+        Stores an entry, possibly evicting another one
+        :param key: board hash
+        :param value: value to store, must not be None
+        :param depth: search depth the value was computed with
+        """
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class LRUTranspositionTable(TranspositionTable):
+    """
+    Evicts the least recently used entry once full
+    """
+
+    def __init__(self, capacity: int):
+        super(LRUTranspositionTable, self).__init__(capacity)
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable, depth: int = 0) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < depth:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, depth: int = 0) -> None:
+        self._entries[key] = (depth, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class DepthPreferredTranspositionTable(TranspositionTable):
+    """
+    Fixed array of slots indexed by the hash; a colliding entry is only replaced by
+    one searched at least as deep, so expensive results survive cheap ones
+    """
+
+    def __init__(self, capacity: int):
+        super(DepthPreferredTranspositionTable, self).__init__(capacity)
+        self._slots = [None] * capacity
+        self._size = 0
+
+    def get(self, key: Hashable, depth: int = 0) -> Any:
+        entry = self._slots[hash(key) % self.capacity]
+        if entry is None or entry[0] != key or entry[1] < depth:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[2]
+
+    def put(self, key: Hashable, value: Any, depth: int = 0) -> None:
+        idx = hash(key) % self.capacity
+        entry = self._slots[idx]
+        if entry is None:
+            self._size += 1
+        elif entry[0] != key and entry[1] > depth:
+            return
+        self._slots[idx] = (key, depth, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self) -> None:
+        self._slots = [None] * self.capacity
+        self._size = 0
@@ -0,0 +1,135 @@
+from __future__ import annotations
+from typing import *
+
+import curses
+import sys
+from collections import Counter
+
+_BORDER = '││──┌┐└┘' if sys.stdout.encoding and sys.stdout.encoding.lower().startswith('utf') else '||--++++'
+
+
+class VirtualWindow:
+    """
+    The part of the curses window API the drawables use, writing into the cell array
+    of a VirtualScreen. Like curses subwindows, subwindows share the cells of the screen.
+    Every call is counted on the screen.
+    """
+
+    def __init__(self, root: VirtualScreen, y: int, x: int, lines: int, cols: int):
+        self._root = root
+        self._y = y
+        self._x = x
+        self._lines = lines
+        self._cols = cols
+        self._background = 0
+
+    def getmaxyx(self) -> Tuple[int, int]:
+        return self._lines, self._cols
+
+    def subwin(self, nlines: int, ncols: int, begin_y: int, begin_x: int) -> VirtualWindow:
+        self._root.calls['subwin'] += 1
+        # like curses, begin_y and begin_x are screen coordinates
+        return VirtualWindow(self._root, begin_y, begin_x, nlines, ncols)
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        self._root.calls['addstr'] += 1
+        self._put(y, x, text, attr)
+
+    def addch(self, y: int, x: int, ch: Union[str, int], attr: int = 0) -> None:
+        self._root.calls['addch'] += 1
+        self._put(y, x, ch if isinstance(ch, str) else chr(ch & curses.A_CHARTEXT), attr)
+
+    def border(self, *args) -> None:
+        self._root.calls['border'] += 1
+        left, right, top, bottom, top_left, top_right, bottom_left, bottom_right = _BORDER
+        attr = self._background
+        inner = self._cols - 2
+        self._put(0, 0, top_left + top * inner + top_right, attr)
+        for y in range(1, self._lines - 1):
+            self._put(y, 0, left, attr)
+            self._put(y, self._cols - 1, right, attr)
+        self._put(self._lines - 1, 0, bottom_left + bottom * inner + bottom_right, attr)
+
+    def bkgd(self, ch: Union[str, int], attr: int = 0) -> None:
+        self._root.calls['bkgd'] += 1
+        self._background = attr & ~curses.A_CHARTEXT
+        self._fill()
+
+    def erase(self) -> None:
+        self._root.calls['erase'] += 1
+        self._fill()
+
+    def clear(self) -> None:
+        self._root.calls['clear'] += 1
+        self._fill()
+
+    def idcok(self, flag: bool) -> None:
+        pass
+
+    def idlok(self, flag: bool) -> None:
+        pass
+
+    def noutrefresh(self) -> None:
+        self._root.calls['noutrefresh'] += 1
+
+    def _put(self, y: int, x: int, text: str, attr: int):
+        # curses raises when writing outside the window, here the text is clipped
+        if not 0 <= y < self._lines or x >= self._cols:
+            return
+        if x < 0:
+            text, x = text[-x:], 0
+        root = self._root
+        screen_y, screen_x = self._y + y, self._x + x
+        if not 0 <= screen_y < root._lines or screen_x >= root._cols:
+            return
+        text = text[:min(self._cols - x, root._cols - screen_x)]
+        start = screen_y * root._cols + screen_x
+        end = start + len(text)
+        root.chars[start:end] = text
+        root.attrs[start:end] = [attr & ~curses.A_CHARTEXT] * len(text)
+
+    def _fill(self):
+        blank = ' ' * self._cols
+        for y in range(self._lines):
+            self._put(y, 0, blank, self._background)
+
+
+class VirtualScreen(VirtualWindow):
+    """
+    Screen living only in memory, as a preallocated array of characters and attributes.
+    Lets drawables be measured and their output compared without a terminal.
+    """
+
+    def __init__(self, size: Tuple[int, int]):
+        """
+        Inits class VirtualScreen
+        :param size: (lines, columns)
+        """
+        super(VirtualScreen, self).__init__(self, 0, 0, *size)
+        self.calls = Counter()
+        self._allocate(*size)
+
+    def _allocate(self, lines: int, cols: int):
+        self._lines = lines
+        self._cols = cols
+        self.chars = [' '] * (lines * cols)
+        self.attrs = [0] * (lines * cols)
+
+    def doupdate(self) -> None:
+        self.calls['doupdate'] += 1
+
+    def check_resize(self) -> bool:
+        return False
+
+    def lines(self) -> List[str]:
+        """
+        Text currently on the screen, one string per line
+        """
+        return [''.join(self.chars[start:start + self._cols]) for start in range(0, len(self.chars), self._cols)]
+
+    def cell(self, y: int, x: int) -> Tuple[str, int]:
+        """
+        Character and attribute at a position
+        """
+        idx = y * self._cols + x
+        return self.chars[idx], self.attrs[idx]
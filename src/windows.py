@@ -2,11 +2,14 @@ from __future__ import annotations
 from typing import *
 
 import curses
+import time
 from abc import ABC
 
 import src.settings as settings
 from src.drawables import Drawable, NText, NBox, NFrame, BoardDrawable, DynamicText
 from src.board import Board
+from src.observers import Observable, Observer
+from src.palette import color_pair
 from src.stats import Stats
 
 
@@ -14,12 +17,20 @@ class Window(Drawable, ABC):
     def __init__(self, screen: curses.window):
         super(Window, self).__init__(screen, 0, 0)
         self._contents = []
-        pass
 
     def draw(self) -> None:
         for drawable in self._contents:
             drawable.draw()
 
+    def invalidate(self) -> None:
+        for drawable in self._contents:
+            drawable.invalidate()
+
+    def noutrefresh(self) -> None:
+        self._screen.noutrefresh()
+        for drawable in self._contents:
+            drawable.noutrefresh()
+
 
 class GameActiveWindow(Window):
     def __init__(self, screen: curses.window, board: Board, stats: Stats):
@@ -40,11 +51,81 @@ class GameActiveWindow(Window):
         self._stats_window = NFrame(screen, 4, 1, 19, 7, 'Stats')
         self._contents.append(self._stats_window)
 
-        self._stats_values = DynamicText(screen, (lambda : f"{str(stats.score)}\n\n"
-                                                           f"{str(stats.lines)}\n\n"
-                                                           f"{str(stats.level)}"), 6, 2,
-                                         curses.color_pair(1), alignment='right', width=15)
+        # values sit right of the labels instead of padding over them, so each is redrawn on its own
+        self._stats_values = DynamicText(screen, lambda: (stats.score, stats.lines, stats.level), 12, 2,
+                                         color_pair(1), formatter=lambda values: '\n\n'.join(map(str, values)),
+                                         alignment='right', width=9)
         self._contents.append(self._stats_values)
 
-        self._stats_text = NText(screen, 'Score\n\nLines\n\nLevel', 6, 2, curses.color_pair(1))
+        self._stats_text = NText(screen, 'Score\n\nLines\n\nLevel', 6, 2, color_pair(1))
         self._contents.append(self._stats_text)
+
+
+class SpectatorWindow(Window, Observer, Observable):
+    """
+    Tiles many boards over the screen at one column per tile. Only boards that changed since
+    the last frame are repainted, and repainting stops once the frame's time budget is spent;
+    the remaining boards are picked up first in the next frame, which the window requests by
+    notifying its observers.
+    """
+
+    def __init__(self, screen: curses.window, boards: List[Board], frame_budget: Optional[float] = None):
+        """
+        Inits class SpectatorWindow
+        :param boards: boards to show, the ones not fitting on the screen are left out
+        :param frame_budget: seconds that may be spent repainting boards in one frame,
+            settings.SPECTATOR_FRAME_BUDGET if None
+        """
+        Window.__init__(self, screen)
+        Observable.__init__(self)
+        self._frame_budget = settings.SPECTATOR_FRAME_BUDGET if frame_budget is None else frame_budget
+        self._next = 0  # board drawn first in the next frame, so no board starves
+
+        lines, cols = screen.getmaxyx()
+        frame_x, frame_y = settings.BOARD_SIZE[0] + 2, settings.BOARD_SIZE[1] + 2
+        per_row = cols // (frame_x + 1)
+        shown = min(len(boards), per_row * ((lines - 1) // frame_y))
+
+        self._contents.append(NText(screen, f'{shown} of {len(boards)} games, Ctrl+C to quit', 1, 0, color_pair(1)))
+        self._board_drawables = []
+        for idx, board in enumerate(boards[:shown]):
+            x = idx % per_row * (frame_x + 1)
+            y = 1 + idx // per_row * frame_y
+            self._contents.append(NFrame(screen, x, y, frame_x, frame_y, title=str(idx + 1)))
+            self._board_drawables.append(BoardDrawable(screen, x + 1, y + 1, board, tile_width=1))
+            board.attach_observer(self)
+
+    def set_board(self, idx: int, board: Board) -> None:
+        """
+        Replaces a board, e.g. after its game restarted
+        """
+        if idx >= len(self._board_drawables):
+            return
+        drawable = self._board_drawables[idx]
+        drawable.board.detach_observer(self)
+        drawable.set_board(board)
+        board.attach_observer(self)
+        self.notify()
+
+    def update(self, observable: Observable, **kwargs) -> None:
+        self.notify()
+
+    def draw(self) -> None:
+        super(SpectatorWindow, self).draw()
+
+        drawables = self._board_drawables
+        deadline = time.perf_counter() + self._frame_budget
+        for offset in range(len(drawables)):
+            idx = (self._next + offset) % len(drawables)
+            if not drawables[idx].dirty:
+                continue
+            if time.perf_counter() > deadline:
+                self._next = idx
+                self.notify()
+                return
+            drawables[idx].draw()
+
+    def invalidate(self) -> None:
+        super(SpectatorWindow, self).invalidate()
+        for drawable in self._board_drawables:
+            drawable.invalidate()
@@ -0,0 +1,17 @@
+from __future__ import annotations
+from typing import *
+
+import functools
+import random
+
+ZOBRIST_SEED = 0x7e7215
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_keys(size_x: int, size_y: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Random 64 bit key for every tile, indexed [x][y] like Board.contents. The keys are
+    generated from a fixed seed, so hashes are stable across runs and processes.
+    """
+    rng = random.Random(ZOBRIST_SEED ^ size_x << 16 ^ size_y)
+    return tuple(tuple(rng.getrandbits(64) for _ in range(size_y)) for _ in range(size_x))
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from src.codec import CodecError, decode, encode
+from src.engines import ENGINES, create_board
+from src.features import compute_features
+from src.randomizer import GENERATORS, create_generator
+from src.stats import Stats
+
+
+def played_board(engine, generator, seed, pieces=10):
+    board = create_board(10, 20, engine=engine, generator=create_generator(generator, seed))
+    rng = random.Random(seed)
+    for _ in range(pieces):
+        for _ in range(rng.randint(0, 3)):
+            board.rotate_block('r')
+        for _ in range(rng.randint(0, 5)):
+            board.move_block(rng.choice('we'))
+        board.hard_drop()
+        board.place_block()
+    assert not board.topped_out
+    return board
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('generator', GENERATORS)
+@pytest.mark.parametrize('track_features', (True, False))
+def test_roundtrip(engine, generator, track_features):
+    board = played_board(engine, generator, 7)
+    stats = Stats()
+    stats.add_placement(2, 10)
+    decoded, decoded_stats = decode(encode(board, stats), track_features)
+
+    assert type(decoded) is type(board)
+    assert decoded.contents == board.contents
+    assert (decoded.piece, decoded.next_piece, decoded.topped_out) == (board.piece, board.next_piece, board.topped_out)
+    assert (decoded.heights, decoded.hash, decoded.features) == (board.heights, board.hash, board.features)
+    assert decoded.preview(10) == board.preview(10)
+    assert (decoded_stats.score, decoded_stats.lines, decoded_stats.level) == (stats.score, stats.lines, stats.level)
+
+    # both go on dealing and placing the same
+    for copy in (board, decoded):
+        copy.hard_drop()
+        copy.place_block()
+    assert decoded.contents == board.contents
+    assert decoded.features == compute_features(decoded.contents)
+    assert encode(decoded) == encode(board)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_truncated_frame(engine):
+    frame = encode(played_board(engine, 'bag', 0))
+    for length in range(len(frame)):
+        with pytest.raises(CodecError):
+            decode(frame[:length])
+
+
+def test_invalid_ids():
+    frame = encode(played_board('list', 'bag', 0))
+    with pytest.raises(CodecError):
+        decode(b'NT\x02\x09' + frame[4:])  # engine
+    with pytest.raises(CodecError):
+        decode(frame[:15] + b'\x09' + frame[16:])  # generator, right after the header and pieces
+    with pytest.raises(CodecError):
+        decode(frame[:6] + b'\x07' + frame[7:])  # piece kind
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_verify_stored_derived_state(engine):
+    frame = encode(played_board(engine, 'bag', 0))
+    board, _ = decode(frame, verify=True)
+    assert encode(board) == frame
+
+    heights_offset = len(frame) - (board.size_x * board.size_y + 1) // 2 - board.size_x
+    tampered_hash = frame[:heights_offset - 1] + bytes([frame[heights_offset - 1] ^ 1]) + frame[heights_offset:]
+    tampered_heights = frame[:heights_offset] + bytes([frame[heights_offset] ^ 1]) + frame[heights_offset + 1:]
+    for tampered in (tampered_hash, tampered_heights):
+        decode(tampered)  # not checked unless asked for
+        with pytest.raises(CodecError):
+            decode(tampered, verify=True)
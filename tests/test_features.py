@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from src.engines import ENGINES, create_board
+from src.features import compute_features
+from src.movegen import MoveGenerator
+from src.pieces import Piece
+from src.randomizer import create_generator
+from src.zobrist import zobrist_keys
+
+
+def recomputed_heights(contents):
+    size_y = len(contents[0])
+    return [next((size_y - y for y, field in enumerate(col) if field is not None), 0) for col in contents]
+
+
+def recomputed_hash(contents):
+    keys = zobrist_keys(len(contents), len(contents[0]))
+    result = 0
+    for col, col_keys in zip(contents, keys):
+        for field, key in zip(col, col_keys):
+            if field is not None:
+                result ^= key
+    return result
+
+
+def assert_derived_state(board):
+    contents = board.contents
+    assert board.features == compute_features(contents)
+    assert board.heights == recomputed_heights(contents)
+    assert board.hash == recomputed_hash(contents)
+
+
+def play(board, moves, rng, pieces):
+    """
+    Places pieces until top out, mostly where a greedy bot would and sometimes at random,
+    so the boards get both cleared lines and holes under overhangs
+    :return: number of cleared lines
+    """
+    lines = 0
+    for _ in range(pieces):
+        placements = moves.placements(board)
+        if rng.random() < 0.25:
+            placement = rng.choice(placements)
+        else:
+            placement = min(placements, key=lambda candidate: score(board, candidate))
+        board.piece = Piece.at(placement.kind, placement.rotation, placement.x, placement.y)
+        lines += board.place_block()
+        assert_derived_state(board)
+        if board.topped_out:
+            break
+    return lines
+
+
+def score(board, placement):
+    trial = board.fork()
+    trial.piece = Piece.at(placement.kind, placement.rotation, placement.x, placement.y)
+    lines = trial.place_block()
+    features = trial.features
+    return features.aggregate_height + 4 * features.holes + features.bumpiness - 8 * lines
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('seed', range(3))
+def test_features_match_recomputation(engine, seed):
+    board = create_board(10, 20, engine=engine, generator=create_generator('bag', seed))
+    assert_derived_state(board)
+    lines = play(board, MoveGenerator(), random.Random(seed), 200)
+    assert lines  # line clears got checked too
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_features_without_tracking(engine):
+    board = create_board(10, 20, engine=engine, generator=create_generator('bag', 0), track_features=False)
+    play(board, MoveGenerator(), random.Random(0), 100)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_undo_restores_features(engine):
+    board = create_board(10, 20, engine=engine, generator=create_generator('bag', 1))
+    board.enable_journal()
+    play(board, MoveGenerator(), random.Random(1), 60)
+    while board.undo():
+        assert_derived_state(board)
+    assert board.features == compute_features(create_board(10, 20).contents)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_clear_line_keeps_rows_that_are_not_full(engine):
+    board = create_board(10, 20, engine=engine, generator=create_generator('bag', 2))
+    play(board, MoveGenerator(), random.Random(2), 20)
+    contents = board.contents
+    for idx in range(board.size_y):
+        assert not board.clear_line(idx)
+    assert board.contents == contents
+    assert_derived_state(board)
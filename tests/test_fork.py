@@ -0,0 +1,48 @@
+import random
+
+import pytest
+
+from src.engines import ENGINES, create_board
+from src.movegen import MoveGenerator
+from src.randomizer import create_generator
+from tests.test_features import assert_derived_state, play
+
+
+def snapshot(board):
+    return ([list(col) for col in board.contents], list(board.heights), board.hash, board.features,
+            board.preview(10), board.piece, board.next_piece, board.topped_out)
+
+
+def played_board(engine, seed, track_features=True):
+    board = create_board(10, 20, engine=engine, generator=create_generator('bag', seed), track_features=track_features)
+    play(board, MoveGenerator(), random.Random(seed), 30)
+    assert not board.topped_out
+    return board
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('track_features', (True, False))
+def test_playing_on_fork_leaves_parent_unchanged(engine, track_features):
+    board = played_board(engine, 4, track_features)
+    before = snapshot(board)
+    fork = board.fork()
+    fork_of_fork = fork.fork()
+    play(fork, MoveGenerator(), random.Random(5), 40)
+    fork.clear_lines(range(board.size_y))
+    assert snapshot(fork) != before
+    assert snapshot(board) == before
+    assert snapshot(fork_of_fork) == before
+    assert_derived_state(board)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_playing_on_parent_leaves_fork_unchanged(engine):
+    board = played_board(engine, 6)
+    fork = board.fork()
+    before = snapshot(fork)
+    play(board, MoveGenerator(), random.Random(7), 40)
+    assert snapshot(board) != before
+    assert snapshot(fork) == before
+    assert_derived_state(fork)
+    # and the fork is still playable from where it was taken
+    play(fork, MoveGenerator(), random.Random(7), 40)
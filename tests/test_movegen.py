@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from src.engines import ENGINES, create_board
+from src.movegen import MoveGenerator
+from src.pieces import I, O, Piece
+from src.randomizer import create_generator
+
+
+def replay(board, path):
+    """
+    Plays the path with the moves the game binds to keys, the final d hard drops and stops before locking
+    """
+    assert path.endswith('d') and 'd' not in path[:-1]
+    for move in path[:-1]:
+        if move == 'r':
+            assert board.rotate_block('r')
+        else:
+            assert move in 'wes'
+            assert board.move_block(move)
+    board.hard_drop()
+
+
+def place(board, kind, rotation, x, y):
+    board.piece = Piece.at(kind, rotation, x, y)
+    board.place_block()
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_paths_reach_their_placement(engine):
+    board = create_board(10, 20, engine=engine, generator=create_generator('bag', 3))
+    rng = random.Random(3)
+    moves = MoveGenerator()
+    for _ in range(30):
+        placements = moves.placements(board)
+        assert isinstance(placements, tuple)
+        for placement in placements:
+            trial = board.fork()
+            replay(trial, placement.path)
+            assert trial.piece == Piece.at(placement.kind, placement.rotation, placement.x, placement.y)
+        placement = rng.choice(placements)
+        board.piece = Piece.at(placement.kind, placement.rotation, placement.x, placement.y)
+        board.place_block()
+        if board.topped_out:
+            break
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_tuck_under_overhang(engine):
+    board = create_board(10, 20, engine=engine, generator=create_generator('bag', 0))
+    # a roof over columns 2-5 on row 17, resting on a square in columns 4-5, open on the left
+    place(board, O, 0, 4, 18)
+    place(board, I, 0, 2, 16)
+    board.piece = Piece.at(O, 0, 4, 0)
+
+    tucked = [placement for placement in MoveGenerator().placements(board)
+              if (placement.x, placement.y) == (2, 18)]
+    assert tucked
+    for placement in tucked:
+        assert 's' in placement.path  # can't be hard dropped there from above
+        trial = board.fork()
+        replay(trial, placement.path)
+        assert trial.piece == Piece.at(O, placement.rotation, 2, 18)
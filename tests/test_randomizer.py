@@ -0,0 +1,46 @@
+import pytest
+
+from src.randomizer import GENERATORS, SPAWN_COLUMNS, ClassicGenerator, SevenBagGenerator, SplitMix64, \
+    create_generator
+
+
+def deal(generator, count):
+    return [generator.next() for _ in range(count)]
+
+
+@pytest.mark.parametrize('name', GENERATORS)
+def test_same_seed_same_sequence(name):
+    assert deal(create_generator(name, 5), 200) == deal(create_generator(name, 5), 200)
+    assert deal(create_generator(name, 5), 200) != deal(create_generator(name, 6), 200)
+
+
+@pytest.mark.parametrize('name', GENERATORS)
+def test_checkpoint_restore_replays(name):
+    generator = create_generator(name, 7)
+    deal(generator, 30)
+    generator.peek(3)  # part of the next batch is already queued
+    checkpoint = generator.checkpoint()
+    dealt = deal(generator, 200)
+    generator.restore(checkpoint)
+    assert deal(generator, 200) == dealt
+    assert deal(generator.fork(), 50) == deal(generator, 50)
+
+
+def test_bag_deals_permutations():
+    generator = SevenBagGenerator(11, batch_size=5)  # batches not aligned with bags
+    kinds = [kind for kind, _ in deal(generator, 7 * 40)]
+    for start in range(0, len(kinds), 7):
+        assert sorted(kinds[start:start + 7]) == list(range(7))
+
+
+def test_classic_rerolls_across_batches():
+    # one piece per batch, so every repeat check relies on the previous batch's last piece
+    generator = ClassicGenerator(13, batch_size=1)
+    rng = SplitMix64(13)
+    last = None
+    for _ in range(300):
+        kind = rng.randbelow(8)
+        if kind == 7 or kind == last:
+            kind = rng.randbelow(7)
+        last = kind
+        assert generator.next() == (kind, SPAWN_COLUMNS[rng.randbelow(len(SPAWN_COLUMNS))])
@@ -0,0 +1,67 @@
+from src.benchmarks import SCREEN_SIZE, WindowScenario, bench_window_draw
+from src.renderer import AnsiRenderer
+from src.virtualscreen import VirtualScreen, _BORDER
+from src.windows import GameActiveWindow
+
+CALL_BUDGET = 10  # screen calls per GameActiveWindow frame, as in the CI example of the README
+
+# seed 0, 120 bot actions
+GOLDEN_FRAME = '''
+
+    +------Stats------+   +--------Game--------+
+    | Score       206 |   | . . . . . . . . . .|
+    |                 |   | . . .   .         .|
+    | Lines         0 |   | . . .     . . . . .|
+    |                 |   | .   . .   . . . . .|
+    | Level         1 |   | .           . . . .|
+    +-----------------+   | .   . . .     . . .|
+                          | .     . .   . . . .|
+                          | . .         . . . .|
+                          | . .       . . . . .|
+                          | . . .   . .     . .|
+                          | . . .             .|
+                          | . . . . .          |
+                          | . . . . .   . .    |
+                          | . . . .           .|
+                          | . . . .     . . . .|
+                          | . . . . .   . . . .|
+                          | .             . . .|
+                          | . . .       . . . .|
+                          | . . .     .     . .|
+                          | . . .   . .     . .|
+                          +--------------------+
+
+'''.split('\n')[1:-1]
+
+
+def screen_text(screen):
+    # border characters depend on the encoding of stdout
+    ascii_border = str.maketrans(_BORDER, '||--++++')
+    return [line.translate(ascii_border).rstrip() for line in screen.lines()]
+
+
+def played_scenario(steps):
+    screen = VirtualScreen(SCREEN_SIZE)
+    scenario = WindowScenario(screen, AnsiRenderer, seed=0)
+    scenario.renderer.draw_frame()
+    for _ in range(steps):
+        scenario.step()
+    return screen, scenario
+
+
+def test_golden_frame():
+    screen, _ = played_scenario(120)
+    assert screen_text(screen) == GOLDEN_FRAME
+
+
+def test_incremental_frames_match_full_redraw():
+    screen, scenario = played_scenario(300)
+    fresh = VirtualScreen(SCREEN_SIZE)
+    AnsiRenderer(fresh, GameActiveWindow(fresh, scenario.game.board, scenario.game.stats)).draw_frame()
+    assert screen.chars == fresh.chars
+    assert screen.attrs == fresh.attrs
+
+
+def test_call_budget():
+    calls, _ = bench_window_draw(frames=500)
+    assert calls <= CALL_BUDGET
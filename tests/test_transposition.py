@@ -0,0 +1,44 @@
+from src.transposition import DepthPreferredTranspositionTable, LRUTranspositionTable
+
+
+def test_lru_evicts_least_recently_used():
+    table = LRUTranspositionTable(3)
+    for key in range(3):
+        table.put(key, str(key))
+    assert table.get(0) == '0'  # 1 is now the least recently used
+    table.put(3, '3')
+    assert len(table) == 3
+    assert table.get(1) is None
+    assert [table.get(key) for key in (0, 2, 3)] == ['0', '2', '3']
+    assert (table.hits, table.misses) == (4, 1)
+
+
+def test_lru_depth():
+    table = LRUTranspositionTable(2)
+    table.put(0, 'shallow', depth=1)
+    assert table.get(0, depth=2) is None
+    assert table.get(0, depth=1) == 'shallow'
+
+
+def test_depth_preferred_keeps_deeper_entry():
+    table = DepthPreferredTranspositionTable(8)
+    # small ints hash to themselves, so keys 8 apart share a slot
+    table.put(1, 'deep', depth=3)
+    table.put(9, 'shallow', depth=1)
+    assert table.get(1) == 'deep'
+    assert table.get(9) is None
+    assert len(table) == 1
+
+    table.put(9, 'deeper', depth=4)
+    assert table.get(9) == 'deeper'
+    assert table.get(1) is None
+    assert len(table) == 1
+
+    table.put(9, 'updated', depth=0)  # the same key is always overwritten
+    table.put(2, 'other')
+    assert table.get(9) == 'updated'
+    assert len(table) == 2
+
+    table.clear()
+    assert len(table) == 0
+    assert table.get(2) is None
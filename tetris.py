@@ -1,15 +1,106 @@
+import argparse
 import curses
 import os
 import sys
 
-from src.game import run_game
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description='Tetris in the command line')
+    parser.add_argument('--headless', action='store_true',
+                        help='run the engine without curses or keyboard input and report its throughput')
+    parser.add_argument('--pieces', type=int, default=100000,
+                        help='number of pieces to place in headless mode')
+    parser.add_argument('--script', default=None,
+                        help='whitespace separated actions to repeat in headless mode (random bot if omitted)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed of the piece generator and the headless random bot')
+    parser.add_argument('--generator', default=None,
+                        help='piece generator, see src.randomizer.GENERATORS')
+    parser.add_argument('--engine', default=None,
+                        help='board engine, see src.engines.ENGINES')
+    parser.add_argument('--spectate', type=int, default=None, metavar='N',
+                        help='watch N bot-driven games at once')
+    parser.add_argument('--renderer', choices=('curses', 'ansi'), default=None,
+                        help='draw through curses or write ANSI escape sequences directly')
+    parser.add_argument('--show-fps', action='store_true',
+                        help='show the frame rate and dropped frames in the bottom line')
+    parsed = parser.parse_args(args[1:])
+    if parsed.script is not None:
+        from src.headless import scripted_source
+        try:
+            scripted_source(parsed.script)
+        except ValueError as e:
+            parser.error(str(e))
+    return parsed
+
+
+def run_headless(parsed):
+    import src.settings as settings
+    from src.headless import HeadlessGame, simulate, scripted_source, random_bot_source
+    from src.randomizer import create_generator
+
+    generator = create_generator(parsed.generator or settings.PIECE_GENERATOR, parsed.seed)
+    game = HeadlessGame(engine=parsed.engine, generator=generator)
+    source = scripted_source(parsed.script) if parsed.script else random_bot_source(parsed.seed)
+    result = simulate(game, source, parsed.pieces)
+    print(f"pieces: {result.pieces} ({result.pieces_per_sec:.0f}/s)\n"
+          f"lines:  {result.lines} ({result.lines_per_sec:.0f}/s)\n"
+          f"games:  {result.games}\n"
+          f"time:   {result.elapsed:.3f}s")
+
+
+def run_spectate(parsed, renderer: str):
+    from src.ansi import AnsiScreen
+    from src.palette import init_curses
+    from src.renderer import CursesRenderer, AnsiRenderer
+    from src.spectator import run_spectator
+
+    if renderer == 'ansi':
+        with AnsiScreen() as screen:
+            run_spectator(screen, AnsiRenderer, parsed.spectate, parsed.seed)
+        return
+
+    def run(screen):
+        init_curses()
+        run_spectator(screen, CursesRenderer, parsed.spectate, parsed.seed)
+
+    curses.wrapper(run)
 
 
 def main(args):
-    os.environ.setdefault('ESCDELAY', '25')
+    parsed = parse_args(args)
+    if parsed.headless:
+        run_headless(parsed)
+        return
+
+    import src.settings as settings
+
+    if parsed.engine:
+        settings.BOARD_ENGINE = parsed.engine
+    if parsed.generator:
+        settings.PIECE_GENERATOR = parsed.generator
+    if parsed.renderer:
+        settings.RENDERER = parsed.renderer
+    if parsed.show_fps:
+        settings.SHOW_RENDER_STATS = True
+
+    if parsed.spectate:
+        run_spectate(parsed, settings.RENDERER)
+        return
+
+    from src.game import run_game, run_ansi_game
+
+    if settings.RENDERER == 'ansi':
+        game = run_ansi_game()
+    else:
+        os.environ.setdefault('ESCDELAY', '25')
+        game = curses.wrapper(run_game)
+        curses.endwin()
 
-    curses.wrapper(run_game)
-    curses.endwin()
+    if settings.SHOW_RENDER_STATS:
+        stats = game.commands.stats()
+        print(f"inputs: {stats.applied} applied, {stats.dropped} dropped, "
+              f"latency {stats.mean_latency * 1000:.2f} ms mean, {stats.max_latency * 1000:.2f} ms max")
 
 
 if __name__ == '__main__':